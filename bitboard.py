@@ -0,0 +1,309 @@
+"""
+Bitboard Helpers
+Board constants and bit operations for the 64-bit board representation
+"""
+
+import random
+from typing import Iterator, List, Sequence, Tuple
+
+# Square numbering follows the UI grid: square = row * 8 + col, with
+# row 0 being Black's back rank (a8 = 0, h8 = 7, a1 = 56, h1 = 63).
+
+WHITE_ID = 0
+BLACK_ID = 1
+COLOR_IDS = {'white': WHITE_ID, 'black': BLACK_ID}
+COLOR_NAMES = ('white', 'black')
+
+PAWN = 0
+KNIGHT = 1
+BISHOP = 2
+ROOK = 3
+QUEEN = 4
+KING = 5
+PIECE_TYPES = ('pawn', 'knight', 'bishop', 'rook', 'queen', 'king')
+PIECE_TYPE_IDS = {name: i for i, name in enumerate(PIECE_TYPES)}
+
+FILES = 'abcdefgh'
+RANKS = '87654321'  # Indexed by row, row 0 is the eighth rank
+SQUARE_NAMES = tuple(FILES[sq & 7] + RANKS[sq >> 3] for sq in range(64))
+
+FULL = 0xFFFFFFFFFFFFFFFF
+FILE_A = 0x0101010101010101
+FILE_B = FILE_A << 1
+FILE_G = FILE_A << 6
+FILE_H = FILE_A << 7
+NOT_FILE_A = FULL ^ FILE_A
+NOT_FILE_H = FULL ^ FILE_H
+NOT_FILE_AB = FULL ^ (FILE_A | FILE_B)
+NOT_FILE_GH = FULL ^ (FILE_G | FILE_H)
+
+
+def piece_index(color: int, piece_type: int) -> int:
+    """Index of the bitboard holding pieces of this color and type"""
+    return color * 6 + piece_type
+
+
+def square(row: int, col: int) -> int:
+    """Square index of a board coordinate, a8 = 0 and h1 = 63"""
+    return (row << 3) | col
+
+
+# Single-step shifts. Moving towards row 0 is a right shift, towards
+# row 7 a left shift; file masks stop pieces wrapping around the edge.
+def north(bb: int) -> int:
+    return bb >> 8
+
+
+def south(bb: int) -> int:
+    return (bb << 8) & FULL
+
+
+def east(bb: int) -> int:
+    return (bb << 1) & NOT_FILE_A
+
+
+def west(bb: int) -> int:
+    return (bb >> 1) & NOT_FILE_H
+
+
+def north_east(bb: int) -> int:
+    return (bb >> 7) & NOT_FILE_A
+
+
+def north_west(bb: int) -> int:
+    return (bb >> 9) & NOT_FILE_H
+
+
+def south_east(bb: int) -> int:
+    return (bb << 9) & FULL & NOT_FILE_A
+
+
+def south_west(bb: int) -> int:
+    return (bb << 7) & FULL & NOT_FILE_H
+
+
+ROOK_DIRECTIONS = (north, south, east, west)
+BISHOP_DIRECTIONS = (north_east, north_west, south_east, south_west)
+KING_DIRECTIONS = ROOK_DIRECTIONS + BISHOP_DIRECTIONS
+
+
+def knight_attacks(bb: int) -> int:
+    """Squares attacked by knights on the given bitboard"""
+    attacks = ((bb << 17) & NOT_FILE_A) | ((bb << 15) & NOT_FILE_H)
+    attacks |= ((bb << 10) & NOT_FILE_AB) | ((bb << 6) & NOT_FILE_GH)
+    attacks |= ((bb >> 6) & NOT_FILE_AB) | ((bb >> 10) & NOT_FILE_GH)
+    attacks |= ((bb >> 15) & NOT_FILE_A) | ((bb >> 17) & NOT_FILE_H)
+    return attacks & FULL
+
+
+def king_attacks(bb: int) -> int:
+    """Squares attacked by kings on the given bitboard"""
+    attacks = 0
+    for step in KING_DIRECTIONS:
+        attacks |= step(bb)
+    return attacks
+
+
+def pawn_attacks(bb: int, color: int) -> int:
+    """Squares attacked diagonally by pawns of the given color"""
+    if color == WHITE_ID:
+        return north_east(bb) | north_west(bb)
+    return south_east(bb) | south_west(bb)
+
+
+def pawn_pushes(bb: int, color: int) -> int:
+    """Squares one step forward for pawns of the given color"""
+    return north(bb) if color == WHITE_ID else south(bb)
+
+
+def sliding_attacks(bb: int, occupancy: int, directions) -> int:
+    """Ray attacks along each direction, stopping at the first blocker"""
+    attacks = 0
+    for step in directions:
+        ray = step(bb)
+        while ray:
+            attacks |= ray
+            if ray & occupancy:
+                break
+            ray = step(ray)
+    return attacks
+
+
+def iter_bits(bb: int) -> Iterator[int]:
+    """Yield the square numbers set in a bitboard, lowest first"""
+    while bb:
+        lsb = bb & -bb
+        yield lsb.bit_length() - 1
+        bb ^= lsb
+
+
+def to_coordinates(bb: int) -> List[Tuple[int, int]]:
+    """List the (row, col) coordinates set in a bitboard"""
+    return [(sq >> 3, sq & 7) for sq in iter_bits(bb)]
+
+
+# Attack tables for the non-sliding pieces, indexed by square (and by
+# color for pawns). Built once at import from the shift helpers above.
+KNIGHT_ATTACKS = tuple(knight_attacks(1 << sq) for sq in range(64))
+KING_ATTACKS = tuple(king_attacks(1 << sq) for sq in range(64))
+PAWN_ATTACKS = tuple(
+    tuple(pawn_attacks(1 << sq, color) for sq in range(64)) for color in (WHITE_ID, BLACK_ID)
+)
+PAWN_PUSHES = tuple(
+    tuple(pawn_pushes(1 << sq, color) for sq in range(64)) for color in (WHITE_ID, BLACK_ID)
+)
+# Two-step pushes, only non-empty for pawns on their starting row
+PAWN_DOUBLE_PUSHES = tuple(
+    tuple(pawn_pushes(pawn_pushes(1 << sq, color), color) if sq >> 3 == start_row else 0
+          for sq in range(64))
+    for color, start_row in ((WHITE_ID, 6), (BLACK_ID, 1))
+)
+
+
+
+def _between_row(sq: int) -> Tuple[int, ...]:
+    row = [0] * 64
+    for step in KING_DIRECTIONS:
+        between = 0
+        ray = step(1 << sq)
+        while ray:
+            row[ray.bit_length() - 1] = between
+            between |= ray
+            ray = step(ray)
+    return tuple(row)
+
+
+# BETWEEN[a][b]: squares strictly between two squares on a shared line, else 0
+BETWEEN = tuple(_between_row(sq) for sq in range(64))
+
+# Zobrist keys: one random 64-bit number per (piece index, square). The
+# hash of a position is the XOR of the keys of every piece on the board,
+# so a move updates it with two or three XORs.
+_zobrist_rng = random.Random(2024)
+ZOBRIST = tuple(tuple(_zobrist_rng.getrandbits(64) for _ in range(64)) for _ in range(12))
+ZOBRIST_BLACK_TO_MOVE = _zobrist_rng.getrandbits(64)
+
+
+# Magic bitboards for the sliding pieces: the blockers on a square's
+# relevant rays are multiplied by a per-square magic constant so that the
+# top bits form a perfect-hash index into that square's attack table.
+# The constants were found by a sparse random search for this square
+# numbering.
+ROOK_MAGICS = (
+    0x1080004008801020, 0x0840092002C03000, 0x1900200010400900, 0x0880100008000480,
+    0x4200100420080200, 0x8100020100080400, 0x0200040110886200, 0x0200008040220411,
+    0x0404800084400220, 0x0000401000402000, 0x0086001081220440, 0x0408800800100280,
+    0x000A001201040820, 0x8848800200840080, 0x4001000100040200, 0x0442000102105084,
+    0x9080010020804100, 0x0040404000201009, 0x0000808010002009, 0x2200090021D00100,
+    0x0008008008040080, 0x0004004002010040, 0x0011040008015042, 0x00000A0001768104,
+    0x0000800080204009, 0x2010004140002001, 0x9800200280100080, 0x1000100080080080,
+    0x0442000A00049020, 0x2100040080020080, 0x0800120400900148, 0x0010040A00128541,
+    0x2800804000800030, 0x1010002000400041, 0x4000200011004100, 0x0610008410800800,
+    0x0400802402800800, 0xC100020080800400, 0x0002000802000401, 0x0182085882000401,
+    0x0220204000808000, 0x2860100040024022, 0x0001002004110040, 0x99101042000A0020,
+    0x0004080004008080, 0x0010040002008080, 0x2012004881020004, 0x8300842444820011,
+    0x0088403882010200, 0x0820400080210100, 0x0110910040A00300, 0x0801100280080480,
+    0x0242009008200600, 0x1002000489500200, 0x0040800200010080, 0x0091800041000080,
+    0x0000209300488001, 0x04C1002414824001, 0x020020000B001041, 0x7000100004200901,
+    0x8002002004100802, 0x30010002084C0007, 0x0888221800813004, 0x4000002840840112
+)
+BISHOP_MAGICS = (
+    0xA010041108003100, 0x006082020A002900, 0x6810010619200000, 0x08281A0520000408,
+    0x0001104001000400, 0x0018901008048400, 0x00040A0210245280, 0x000200210808A402,
+    0x9140048410821200, 0x0800091010820041, 0x20504804832202C0, 0x0100091401081000,
+    0x8021011140000012, 0x0810020804450400, 0x208B0542109008A2, 0x0080084A08040204,
+    0x0040E2A80811244C, 0x2505022008008108, 0x0430220100420040, 0x010A040420220040,
+    0x1105000290400000, 0x0093001200822120, 0x4000A62048043004, 0x280120048A015004,
+    0x006090002A020814, 0x44042000240800D0, 0x01102800040A4400, 0x1004080080220040,
+    0x0001001011004024, 0x0010044000805040, 0x0914041200820100, 0x0004821012821480,
+    0x0024040500C05021, 0x0088611002080200, 0x0116080A00040020, 0x4000020080080080,
+    0x2450450140840040, 0x0000880201484100, 0x0222020404020092, 0x8081110600002E00,
+    0x2842101105000801, 0x1100809008001025, 0x00020202221C0400, 0x0422014022009020,
+    0x0210046102100C00, 0xC004008082029102, 0x00AA461801101200, 0x0404080080201108,
+    0x020542108C205002, 0x0410544804100100, 0x0040910841100000, 0x0400200042021100,
+    0x00004204850400C0, 0x0200100410A42102, 0x1040020801210102, 0x0805040410420000,
+    0x2884804130100200, 0x800C262201242000, 0x1058000194108800, 0x0014221054420204,
+    0x0104000012A02200, 0x0200881003300100, 0x0140400202840100, 0x0402020801010201
+)
+
+
+def _relevant_mask(bb: int, directions) -> int:
+    """Ray squares whose occupancy affects the attacks (board edges excluded)"""
+    mask = 0
+    for step in directions:
+        ray = step(bb)
+        while ray and step(ray):
+            mask |= ray
+            ray = step(ray)
+    return mask
+
+
+def _build_attack_table(sq: int, mask: int, magic: int, shift: int, directions) -> List[int]:
+    """Attack sets for every blocker subset of the mask, stored at its magic index"""
+    table = [0] * (1 << (64 - shift))
+    subset = 0
+    while True:
+        index = ((subset * magic) & FULL) >> shift
+        table[index] = sliding_attacks(1 << sq, subset, directions)
+        subset = (subset - mask) & mask
+        if not subset:
+            return table
+
+
+def _build_magic_tables(magics: Sequence[int], directions):
+    """Masks, index shifts and attack tables for all 64 squares"""
+    masks = tuple(_relevant_mask(1 << sq, directions) for sq in range(64))
+    shifts = tuple(64 - bin(mask).count("1") for mask in masks)
+    tables = tuple(
+        _build_attack_table(sq, masks[sq], magics[sq], shifts[sq], directions) for sq in range(64)
+    )
+    return masks, shifts, tables
+
+
+ROOK_MASKS, ROOK_SHIFTS, ROOK_TABLES = _build_magic_tables(ROOK_MAGICS, ROOK_DIRECTIONS)
+BISHOP_MASKS, BISHOP_SHIFTS, BISHOP_TABLES = _build_magic_tables(BISHOP_MAGICS, BISHOP_DIRECTIONS)
+
+
+def rook_attacks(sq: int, occupancy: int) -> int:
+    """Rook attacks from a square given the board occupancy"""
+    return ROOK_TABLES[sq][(((occupancy & ROOK_MASKS[sq]) * ROOK_MAGICS[sq]) & FULL) >> ROOK_SHIFTS[sq]]
+
+
+def bishop_attacks(sq: int, occupancy: int) -> int:
+    """Bishop attacks from a square given the board occupancy"""
+    return BISHOP_TABLES[sq][(((occupancy & BISHOP_MASKS[sq]) * BISHOP_MAGICS[sq]) & FULL) >> BISHOP_SHIFTS[sq]]
+
+
+def queen_attacks(sq: int, occupancy: int) -> int:
+    """Queen attacks from a square given the board occupancy"""
+    return rook_attacks(sq, occupancy) | bishop_attacks(sq, occupancy)
+
+
+def square_attacked_by(bb: Sequence[int], sq: int, by_color: int, occupancy: int) -> bool:
+    """Check if any piece of by_color attacks the square
+
+    Probes backwards from the target square with each piece's attack
+    pattern, cheapest and most common attackers first.
+    """
+    base = by_color * 6
+    if PAWN_ATTACKS[1 - by_color][sq] & bb[base + PAWN]:
+        return True
+    if KNIGHT_ATTACKS[sq] & bb[base + KNIGHT]:
+        return True
+    queens = bb[base + QUEEN]
+    if bishop_attacks(sq, occupancy) & (bb[base + BISHOP] | queens):
+        return True
+    if rook_attacks(sq, occupancy) & (bb[base + ROOK] | queens):
+        return True
+    return bool(KING_ATTACKS[sq] & bb[base + KING])
+
+
+def attackers_to(bb: Sequence[int], sq: int, by_color: int, occupancy: int) -> int:
+    """Bitboard of every piece of by_color that attacks the square"""
+    base = by_color * 6
+    queens = bb[base + QUEEN]
+    return ((PAWN_ATTACKS[1 - by_color][sq] & bb[base + PAWN])
+            | (KNIGHT_ATTACKS[sq] & bb[base + KNIGHT])
+            | (bishop_attacks(sq, occupancy) & (bb[base + BISHOP] | queens))
+            | (rook_attacks(sq, occupancy) & (bb[base + ROOK] | queens))
+            | (KING_ATTACKS[sq] & bb[base + KING]))
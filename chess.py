@@ -1,8 +1,15 @@
 import pygame
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor
+from bitboard import (
+    FILES, RANKS, SQUARE_NAMES, WHITE_ID, COLOR_IDS, COLOR_NAMES, PIECE_TYPES, PIECE_TYPE_IDS, ZOBRIST, ZOBRIST_BLACK_TO_MOVE, piece_index, square, square_attacked_by, iter_bits,
+    to_coordinates
+)
+from movegen import pseudo_legal_targets, legal_targets, legal_moves, is_legal_move, has_legal_move
 from chess_engine_adapter import ChessEngineManager
-from chess_analysis import ChessAnalysisManager
+from chess_analysis import ChessAnalysisManager, wdl_percentages
+from text_cache import render_text
 from win_probability_widget import WinProbabilityWidget
 
 pygame.init()
@@ -30,6 +37,17 @@ TEXT_COLOR = (220, 220, 220)
 BUTTON_COLOR = (70, 70, 70)
 BUTTON_HOVER = (90, 90, 90)
 BUTTON_TEXT = (255, 255, 255)
+BUTTON_DISABLED_TEXT = (100, 100, 100)
+IDLE_WAIT_MS = 100  # Longest the main loop sleeps waiting for events
+ENGINE_MOVE_DELAY_MS = 500  # Minimum engine "thinking" time, for visual feedback
+ENGINE_MOVE_READY = pygame.USEREVENT + 1  # Posted by the engine worker with its move
+EVALUATION_READY = pygame.USEREVENT + 2  # Posted by the engine worker with a position evaluation
+TOP_MOVES_READY = pygame.USEREVENT + 3  # Posted by the engine worker with the best moves of a position
+HISTORY_BOTTOM = WINDOW_HEIGHT - 200  # Last y at which a move history row is started
+PROB_BAR_WIDTH = PANEL_WIDTH - 40  # Width of the compact win probability bar
+DIFFICULTY_PRESETS = (('Easy', 5, (100, 255, 100)), ('Medium', 10, (255, 255, 100)),
+                      ('Hard', 15, (255, 150, 100)), ('Maximum', 20, (255, 100, 100)))  # Name, level, highlight color
+DIFFICULTY_COLORS = ((100, 255, 100), (255, 255, 100), (255, 150, 100), (255, 100, 100))  # Slider fill per band of five levels
 
 class ChessPiece:
     def __init__(self, color, piece_type, row, col):
@@ -38,175 +56,146 @@ class ChessPiece:
         self.row = row
         self.col = col
         self.has_moved = False
+        self.color_id = COLOR_IDS[color]
+        self.type_id = PIECE_TYPE_IDS[piece_type]
+        self.index = piece_index(self.color_id, self.type_id)
     
-    def get_valid_moves(self, board, check_for_check=True):
-        moves = []
-        if self.piece_type == 'pawn':
-            moves = self._get_pawn_moves(board)
-        elif self.piece_type == 'rook':
-            moves = self._get_rook_moves(board)
-        elif self.piece_type == 'knight':
-            moves = self._get_knight_moves(board)
-        elif self.piece_type == 'bishop':
-            moves = self._get_bishop_moves(board)
-        elif self.piece_type == 'queen':
-            moves = self._get_queen_moves(board)
-        elif self.piece_type == 'king':
-            moves = self._get_king_moves(board)
-        
+    def get_moves_bb(self, game):
+        """Bitboard of legal destination squares, cached per position"""
+        sq = square(self.row, self.col)
+        cache_key = (game.zobrist, sq)
+        targets = game._move_cache.get(cache_key)
+        if targets is None:
+            # Only keep moves that don't put own king in check
+            targets = legal_targets(game.bb, self.color_id, self.type_id, sq, game.king_sq[self.color_id])
+            game._move_cache[cache_key] = targets
+        return targets
+    
+    def get_valid_moves(self, game, check_for_check=True):
         if not check_for_check:
-            return moves
-            
-        # Filter out moves that would put own king in check
-        valid_moves = []
-        for move_row, move_col in moves:
-            if self._is_move_legal(board, move_row, move_col):
-                valid_moves.append((move_row, move_col))
-        
-        return valid_moves
-    
-    def _is_move_legal(self, board, to_row, to_col):
-        # Simulate the move
-        from_row, from_col = self.row, self.col
-        captured_piece = board[to_row][to_col]
-        
-        # Make the move
-        board[to_row][to_col] = self
-        board[from_row][from_col] = None
-        original_row, original_col = self.row, self.col
-        self.row, self.col = to_row, to_col
-        
-        # Check if this move puts own king in check
-        king_in_check = False
-        for row in range(8):
-            for col in range(8):
-                piece = board[row][col]
-                if piece and piece.color == self.color and piece.piece_type == 'king':
-                    # Check if any opponent piece can attack this king
-                    opponent_color = 'black' if self.color == 'white' else 'white'
-                    for opp_row in range(8):
-                        for opp_col in range(8):
-                            opp_piece = board[opp_row][opp_col]
-                            if opp_piece and opp_piece.color == opponent_color:
-                                opp_moves = opp_piece.get_valid_moves(board, check_for_check=False)
-                                if (row, col) in opp_moves:
-                                    king_in_check = True
-                                    break
-                        if king_in_check:
-                            break
-                    break
-        
-        # Undo the move
-        board[from_row][from_col] = self
-        board[to_row][to_col] = captured_piece
-        self.row, self.col = original_row, original_col
-        
-        return not king_in_check
-    
-    def _get_pawn_moves(self, board):
-        moves = []
-        direction = -1 if self.color == 'white' else 1
-        start_row = 6 if self.color == 'white' else 1
-        
-        # Forward move
-        new_row = self.row + direction
-        if 0 <= new_row < 8 and board[new_row][self.col] is None:
-            moves.append((new_row, self.col))
-            # Double move from starting position
-            if self.row == start_row and board[new_row + direction][self.col] is None:
-                moves.append((new_row + direction, self.col))
-        
-        # Captures
-        for dc in [-1, 1]:
-            new_col = self.col + dc
-            if 0 <= new_row < 8 and 0 <= new_col < 8:
-                if board[new_row][new_col] is not None and board[new_row][new_col].color != self.color:
-                    moves.append((new_row, new_col))
-        
-        return moves
-    
-    def _get_rook_moves(self, board):
-        moves = []
-        directions = [(0, 1), (0, -1), (1, 0), (-1, 0)]
-        for dr, dc in directions:
-            for i in range(1, 8):
-                new_row, new_col = self.row + dr * i, self.col + dc * i
-                if not (0 <= new_row < 8 and 0 <= new_col < 8):
-                    break
-                if board[new_row][new_col] is None:
-                    moves.append((new_row, new_col))
-                else:
-                    if board[new_row][new_col].color != self.color:
-                        moves.append((new_row, new_col))
-                    break
-        return moves
-    
-    def _get_knight_moves(self, board):
-        moves = []
-        knight_moves = [(-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)]
-        for dr, dc in knight_moves:
-            new_row, new_col = self.row + dr, self.col + dc
-            if 0 <= new_row < 8 and 0 <= new_col < 8:
-                if board[new_row][new_col] is None or board[new_row][new_col].color != self.color:
-                    moves.append((new_row, new_col))
-        return moves
-    
-    def _get_bishop_moves(self, board):
-        moves = []
-        directions = [(1, 1), (1, -1), (-1, 1), (-1, -1)]
-        for dr, dc in directions:
-            for i in range(1, 8):
-                new_row, new_col = self.row + dr * i, self.col + dc * i
-                if not (0 <= new_row < 8 and 0 <= new_col < 8):
-                    break
-                if board[new_row][new_col] is None:
-                    moves.append((new_row, new_col))
-                else:
-                    if board[new_row][new_col].color != self.color:
-                        moves.append((new_row, new_col))
-                    break
-        return moves
-    
-    def _get_queen_moves(self, board):
-        return self._get_rook_moves(board) + self._get_bishop_moves(board)
-    
-    def _get_king_moves(self, board):
-        moves = []
-        for dr in [-1, 0, 1]:
-            for dc in [-1, 0, 1]:
-                if dr == 0 and dc == 0:
-                    continue
-                new_row, new_col = self.row + dr, self.col + dc
-                if 0 <= new_row < 8 and 0 <= new_col < 8:
-                    if board[new_row][new_col] is None or board[new_row][new_col].color != self.color:
-                        moves.append((new_row, new_col))
-        return moves
+            return to_coordinates(pseudo_legal_targets(game.bb, self.color_id, self.type_id, square(self.row, self.col)))
+        return to_coordinates(self.get_moves_bb(game))
+
+class PositionSnapshot:
+    """Read-only copy of a position, handed to the engine worker thread"""
+    
+    def __init__(self, game):
+        self.board = tuple(game.board)
+        self.bb = tuple(game.bb)
+        self.king_sq = tuple(game.king_sq)
+        self.side = game.side
+        self.move_history = tuple(game.move_history)
+        self._position_key = game.position_key()
+    
+    @property
+    def current_player(self):
+        return COLOR_NAMES[self.side]
+    
+    def position_key(self):
+        """Zobrist key of the placement and the side to move"""
+        return self._position_key
+    
+    def legal_moves(self):
+        """Legal moves for the side to move, packed as from_sq << 6 | to_sq"""
+        return legal_moves(self.bb, self.side, self.king_sq[self.side])
 
 class ChessGame:
     def __init__(self):
-        self.board = [[None for _ in range(8)] for _ in range(8)]
-        self.current_player = 'white'
+        self.board = [None] * 64  # Mailbox indexed by square, row * 8 + col
+        self.bb = [0] * 12  # One bitboard per color and piece type
+        self.king_sq = [60, 4]  # King square per color id
+        self.occ = [0, 0]  # Occupancy per color id, kept in step with bb
+        self.occ_all = 0  # Occupancy of both colors
+        self.zobrist = 0  # Hash of the piece placement
+        self._move_cache = {}  # (zobrist, square) -> legal destination bitboard
+        self._check_cache = (None, 0)  # (zobrist, squares of kings in check)
+        self.side = WHITE_ID  # Color id of the side to move
         self.selected_piece = None
         self.selected_pos = None
-        self.valid_moves = []
-        self.capture_moves = []
-        self.piece_images = {}
+        self.valid_mask = 0  # Bitboard of the selected piece's legal destinations
+        self.capture_mask = 0  # Subset of valid_mask holding enemy pieces
+        self.piece_images = {}  # Scaled piece images keyed by bitboard index
         self.game_over = False
         self.winner = None
         self.move_history = []
         self.buttons = []
         self.game_mode = 'PvP'  # 'PvP' or 'Engine'
         self.engine_manager = ChessEngineManager()
-        self.player_color = 'white'  # Player plays as white against engine
+        self.player_side = WHITE_ID  # Player plays as white against engine
         self.show_difficulty_config = False
         self.difficulty_level = 10  # 1-20 scale
         self.analysis_manager = ChessAnalysisManager(self.engine_manager)
         self.win_probability_widget = WinProbabilityWidget()
         self.show_analysis = False
+        self._analyzed_key = None  # Position key of the last analysis update
+        self._evaluation_cache = {}  # Position key -> engine evaluation
+        self._evaluation_pending = set()  # Position keys queued on the engine worker
+        self._top_moves_cache = {}  # (position key, count) -> engine's best moves
+        self._top_moves_pending = set()  # (position key, count) queued on the engine worker
+        self._eval_label_key = None  # (type, value) of the evaluation _eval_label was formatted from
+        self._eval_label = ""
+        self._wdl_key = None  # WDL stats that _wdl_cache was computed for
+        self._wdl_cache = None  # (rendered probability bar, percentage label), None if not drawable
+        self.dirty = True  # Screen needs to be redrawn
+        self._menu_surf = None  # Rendered menu bar, reused while _menu_key is unchanged
+        self._menu_key = None
+        self._history_moves = None  # Move list that _history_surf was rendered from
+        self._history_surf = None
+        self._history_rows = 0
+        self._mate_executor = ThreadPoolExecutor(max_workers=1)
+        self._mate_future = None  # Pending checkmate test for the side in check
+        self._mate_winner = None
+        self._engine_executor = ThreadPoolExecutor(max_workers=1)
+        self._engine_busy = False  # An engine move has been requested and not applied yet
+        self._position_version = 0  # Bumped on every change, to drop stale engine moves
+        self.setup_fonts()
         self.setup_buttons()
+        self.build_background_surface()
+        self.build_game_over_layer()
+        self.build_config_surface()
         self.load_piece_images()
         self.setup_board()
     
+    @property
+    def current_player(self):
+        """Name of the side to move, for display and saved games"""
+        return COLOR_NAMES[self.side]
+    
+    @current_player.setter
+    def current_player(self, color):
+        self.side = COLOR_IDS[color]
+    
+    @property
+    def player_color(self):
+        """Name of the color the human plays in engine mode"""
+        return COLOR_NAMES[self.player_side]
+    
+    @player_color.setter
+    def player_color(self, color):
+        self.player_side = COLOR_IDS[color]
+    
+    def setup_fonts(self):
+        """Create fonts once and pre-render text that never changes"""
+        self.notation_font = pygame.font.Font(None, 24)
+        self.title_font = pygame.font.Font(None, 32)
+        self.move_font = pygame.font.Font(None, 22)
+        self.small_font = pygame.font.Font(None, 20)
+        self.subtitle_font = pygame.font.Font(None, 48)
+        self.button_font = pygame.font.Font(None, 20)
+        self.headline_font = pygame.font.Font(None, 72)
+        self.panel_title_font = pygame.font.Font(None, 24)
+        self.analysis_font = pygame.font.Font(None, 18)
+        self.preset_font = pygame.font.Font(None, 16)
+        
+        self._file_surfs = [self.notation_font.render(letter, True, TEXT_COLOR) for letter in FILES]
+        self._rank_surfs = [self.notation_font.render(digit, True, TEXT_COLOR) for digit in RANKS]
+        self._history_title_surf = self.title_font.render("Move History", True, TEXT_COLOR)
+        self._button_text_surfs = {}  # (button text, color) -> rendered surface
+        self._checkmate_shadow_surf = self.headline_font.render("CHECKMATE!", True, BLACK)
+        self._checkmate_surf = self.headline_font.render("CHECKMATE!", True, WHITE)
+        self._winner_surfs = {color: self.subtitle_font.render(f"{color.upper()} WINS", True, (255, 215, 0))  # Gold color
+                              for color in COLOR_NAMES}
+    
     def setup_buttons(self):
         button_width = 80
         button_height = 30
@@ -222,22 +211,61 @@ class ChessGame:
             {'text': 'Save', 'rect': pygame.Rect(10 + 5 * (button_width + spacing), button_y, button_width, button_height), 'action': 'save'},
             {'text': 'Load', 'rect': pygame.Rect(10 + 6 * (button_width + spacing), button_y, button_width, button_height), 'action': 'load'}
         ]
+        
+        for button in self.buttons:
+            for text_color in (BUTTON_TEXT, BUTTON_DISABLED_TEXT):
+                self._button_text_surfs[(button['text'], text_color)] = self.button_font.render(
+                    button['text'], True, text_color)
+        
+        self.setup_preset_buttons()
+    
+    def setup_preset_buttons(self):
+        """Lay out the difficulty preset buttons and render their labels for both states"""
+        panel_x = BOARD_SIZE + 2 * MARGIN
+        preset_y = MENU_HEIGHT + 200
+        button_width = 50
+        button_height = 25
+        spacing = 5
+        
+        self._preset_buttons = []
+        for i, (name, level, color) in enumerate(DIFFICULTY_PRESETS):
+            button_rect = pygame.Rect(panel_x + 10 + i * (button_width + spacing), preset_y, button_width, button_height)
+            active_text = self.preset_font.render(name, True, BLACK)
+            inactive_text = self.preset_font.render(name, True, BUTTON_TEXT)
+            self._preset_buttons.append({
+                'level': level,
+                'rect': button_rect,
+                'color': color,
+                'active_text': active_text,
+                'inactive_text': inactive_text,
+                'text_rect': active_text.get_rect(center=button_rect.center)
+            })
     
     def restart_game(self):
-        self.board = [[None for _ in range(8)] for _ in range(8)]
-        self.current_player = 'white'
+        self.clear_position()
+        self.side = WHITE_ID
         self.selected_piece = None
         self.selected_pos = None
-        self.valid_moves = []
-        self.capture_moves = []
+        self.valid_mask = 0
+        self.capture_mask = 0
         self.game_over = False
         self.winner = None
-        self.move_history = []
+        self.move_history.clear()
+        self._mate_future = None
         self.setup_board()
+        self.dirty = True
     
     def save_game(self):
         import json
+        self.resolve_checkmate(wait=True)
+        moved = 0
+        for sq, piece in enumerate(self.board):
+            if piece and piece.has_moved:
+                moved |= 1 << sq
+        
         game_state = {
+            'bitboards': self.bb,
+            'moved': moved,
             'move_history': self.move_history,
             'current_player': self.current_player,
             'game_over': self.game_over,
@@ -254,15 +282,15 @@ class ChessGame:
             
             self.restart_game()
             
-            # Replay moves
-            for move_notation in game_state['move_history']:
-                # This is a simplified load - in a full implementation you'd need to parse notation
-                pass
+            # Restore the position directly from the saved bitboards
+            if 'bitboards' in game_state:
+                self.load_position(game_state['bitboards'], game_state.get('moved', 0))
             
             self.current_player = game_state['current_player']
             self.game_over = game_state['game_over']
             self.winner = game_state['winner']
             self.move_history = game_state['move_history']
+            self.dirty = True
         except FileNotFoundError:
             pass  # No save file exists
     
@@ -274,20 +302,163 @@ class ChessGame:
                 filepath = os.path.join(pieces_dir, filename)
                 if os.path.exists(filepath):
                     image = pygame.image.load(filepath)
-                    image = pygame.transform.scale(image, (SQUARE_SIZE - 10, SQUARE_SIZE - 10))
-                    self.piece_images[(color, piece_type)] = image
+                    image = pygame.transform.scale(image, (SQUARE_SIZE - 10, SQUARE_SIZE - 10)).convert_alpha()
+                    self.piece_images[piece_index(COLOR_IDS[color], PIECE_TYPE_IDS[piece_type])] = image
+    
+    def build_background_surface(self):
+        """Pre-render everything that never changes: the board, its notation and the panel frames"""
+        background = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT)).convert()
+        background.fill(DARK_GRAY)
+        
+        size = BOARD_SIZE + 2 * MARGIN
+        surface = pygame.Surface((size, size)).convert()
+        surface.fill(DARK_GRAY)
+        
+        # Board squares
+        for row in range(8):
+            for col in range(8):
+                color = LIGHT_BROWN if (row + col) % 2 == 0 else DARK_BROWN
+                rect = pygame.Rect(MARGIN + col * SQUARE_SIZE, MARGIN + row * SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE)
+                pygame.draw.rect(surface, color, rect)
+        
+        # Column letters (a-h) above and below the board
+        for col in range(8):
+            text = self._file_surfs[col]
+            text_rect = text.get_rect(center=(MARGIN + col * SQUARE_SIZE + SQUARE_SIZE // 2, MARGIN // 2))
+            surface.blit(text, text_rect)
+            text_rect = text.get_rect(center=(MARGIN + col * SQUARE_SIZE + SQUARE_SIZE // 2, size - MARGIN // 2))
+            surface.blit(text, text_rect)
+        
+        # Row numbers (1-8)
+        for row in range(8):
+            text = self._rank_surfs[row]
+            text_rect = text.get_rect(center=(MARGIN // 2, MARGIN + row * SQUARE_SIZE + SQUARE_SIZE // 2))
+            surface.blit(text, text_rect)
+        background.blit(surface, (0, MENU_HEIGHT))
+        
+        # Menu bar background
+        menu_rect = pygame.Rect(0, 0, WINDOW_WIDTH, MENU_HEIGHT)
+        pygame.draw.rect(background, LIGHT_GRAY, menu_rect)
+        pygame.draw.line(background, BORDER_COLOR, (0, MENU_HEIGHT), (WINDOW_WIDTH, MENU_HEIGHT), 2)
+        
+        # Side panel with dark theme
+        panel_x = BOARD_SIZE + 2 * MARGIN
+        panel_rect = pygame.Rect(panel_x, MENU_HEIGHT, PANEL_WIDTH, WINDOW_HEIGHT - MENU_HEIGHT)
+        pygame.draw.rect(background, LIGHT_GRAY, panel_rect)
+        pygame.draw.line(background, BORDER_COLOR, (panel_x, MENU_HEIGHT), (panel_x, WINDOW_HEIGHT), 2)
+        
+        self._background = background
+        
+        # Screen rect and centre of every square, indexed like the bitboards
+        self._square_rects = [pygame.Rect(MARGIN + col * SQUARE_SIZE, MENU_HEIGHT + MARGIN + row * SQUARE_SIZE,
+                                          SQUARE_SIZE, SQUARE_SIZE)
+                              for row in range(8) for col in range(8)]
+        self._square_centers = [rect.center for rect in self._square_rects]
+    
+    def build_game_over_layer(self):
+        """Prepare the checkmate overlay and banner, one blit list per winner"""
+        # Semi-transparent overlay
+        overlay = pygame.Surface((BOARD_SIZE, BOARD_SIZE))
+        overlay.set_alpha(180)
+        overlay.fill(BLACK)
+        center_x = (BOARD_SIZE + 2 * MARGIN) // 2
+        center_y = (WINDOW_HEIGHT + MENU_HEIGHT) // 2
+        
+        # Winner announcement with shadow effect
+        banner = [
+            (overlay, (MARGIN, MENU_HEIGHT + MARGIN)),
+            (self._checkmate_shadow_surf, self._checkmate_shadow_surf.get_rect(center=(center_x + 2, center_y - 20 + 2))),
+            (self._checkmate_surf, self._checkmate_surf.get_rect(center=(center_x, center_y - 20))),
+        ]
+        self._game_over_blits = {}
+        for color, subtitle_surface in self._winner_surfs.items():
+            subtitle_rect = subtitle_surface.get_rect(center=(center_x, center_y + 30))
+            self._game_over_blits[color] = banner + [(subtitle_surface, subtitle_rect)]
+    
+    def build_config_surface(self):
+        """Pre-render the static parts of the difficulty panel: frame, title and slider track"""
+        surface = pygame.Surface((PANEL_WIDTH - 10, 200)).convert()
+        config_rect = surface.get_rect()
+        pygame.draw.rect(surface, (50, 50, 50), config_rect)
+        pygame.draw.rect(surface, BORDER_COLOR, config_rect, 2)
+        
+        title = self.panel_title_font.render("Difficulty Configuration", True, TEXT_COLOR)
+        surface.blit(title, (5, 10))
+        
+        slider_bg = pygame.Rect(15, 60, 180, 20)
+        pygame.draw.rect(surface, (30, 30, 30), slider_bg)
+        pygame.draw.rect(surface, BORDER_COLOR, slider_bg, 1)
+        self._config_surf = surface
     
     def setup_board(self):
         # Pawns
         for col in range(8):
-            self.board[1][col] = ChessPiece('black', 'pawn', 1, col)
-            self.board[6][col] = ChessPiece('white', 'pawn', 6, col)
+            self.place_piece(ChessPiece('black', 'pawn', 1, col))
+            self.place_piece(ChessPiece('white', 'pawn', 6, col))
         
         # Other pieces
         piece_order = ['rook', 'knight', 'bishop', 'queen', 'king', 'bishop', 'knight', 'rook']
         for col in range(8):
-            self.board[0][col] = ChessPiece('black', piece_order[col], 0, col)
-            self.board[7][col] = ChessPiece('white', piece_order[col], 7, col)
+            self.place_piece(ChessPiece('black', piece_order[col], 0, col))
+            self.place_piece(ChessPiece('white', piece_order[col], 7, col))
+    
+    def clear_position(self):
+        """Empty the board, reusing the existing mailbox and bitboard lists"""
+        self._position_version += 1
+        self._engine_busy = False
+        board = self.board
+        for sq in range(64):
+            board[sq] = None
+        bb = self.bb
+        for index in range(12):
+            bb[index] = 0
+        self.occ[0] = self.occ[1] = 0
+        self.occ_all = 0
+        self.zobrist = 0
+        self._move_cache.clear()
+    
+    def load_position(self, bitboards, moved=0):
+        """Replace the current position with the pieces on the given bitboards"""
+        self.clear_position()
+        for index, bb in enumerate(bitboards):
+            color = COLOR_NAMES[index // 6]
+            for sq in iter_bits(bb):
+                piece = ChessPiece(color, PIECE_TYPES[index % 6], sq >> 3, sq & 7)
+                piece.has_moved = bool((moved >> sq) & 1)
+                self.place_piece(piece)
+    
+    def place_piece(self, piece):
+        """Put a piece on the board and its bitboard"""
+        sq = square(piece.row, piece.col)
+        self.board[sq] = piece
+        self.bb[piece.index] |= 1 << sq
+        self.occ[piece.color_id] |= 1 << sq
+        self.occ_all |= 1 << sq
+        self.zobrist ^= ZOBRIST[piece.index][sq]
+        if piece.piece_type == 'king':
+            self.king_sq[piece.color_id] = sq
+    
+    def move_piece_bits(self, piece, from_sq, to_sq, captured_piece=None):
+        """Mirror a move on the bitboards and occupancies"""
+        move_bits = (1 << from_sq) | (1 << to_sq)
+        self.bb[piece.index] ^= move_bits
+        self.occ[piece.color_id] ^= move_bits
+        if captured_piece:
+            self.bb[captured_piece.index] ^= 1 << to_sq
+            self.occ[captured_piece.color_id] ^= 1 << to_sq
+            self.occ_all ^= 1 << from_sq
+        else:
+            self.occ_all ^= move_bits
+        if piece.piece_type == 'king':
+            self.king_sq[piece.color_id] = to_sq
+    
+    def occupancy(self, color_id):
+        """Bitboard of all squares occupied by one color"""
+        return self.occ[color_id]
+    
+    def occupied(self):
+        """Bitboard of all occupied squares"""
+        return self.occ_all
     
     def get_piece_symbol(self, piece):
         symbols = {
@@ -297,6 +468,8 @@ class ChessGame:
         return symbols[piece.color][piece.piece_type]
     
     def handle_click(self, pos):
+        self.dirty = True
+        
         # Check button clicks first
         for button in self.buttons:
             if button['rect'].collidepoint(pos):
@@ -324,6 +497,7 @@ class ChessGame:
                         self.analysis_manager.toggle_analysis()
                 return
         
+        self.resolve_checkmate(wait=True)
         if self.game_over:
             return
         
@@ -334,7 +508,7 @@ class ChessGame:
                 return
         
         # In engine mode, only allow player moves when it's their turn
-        if self.game_mode == 'Engine' and self.current_player != self.player_color:
+        if self.game_mode == 'Engine' and self.side != self.player_side:
             return
             
         # Adjust for margin and menu
@@ -348,43 +522,75 @@ class ChessGame:
         row = board_y // SQUARE_SIZE
         
         if self.selected_piece is None:
-            piece = self.board[row][col]
-            if piece is not None and piece.color == self.current_player:
+            piece = self.board[square(row, col)]
+            if piece is not None and piece.color_id == self.side:
                 self.selected_piece = piece
                 self.selected_pos = (row, col)
-                self.valid_moves = piece.get_valid_moves(self.board)
-                self.capture_moves = [(r, c) for r, c in self.valid_moves 
-                                    if self.board[r][c] is not None]
+                self.valid_mask = piece.get_moves_bb(self)
+                self.capture_mask = self.valid_mask & self.occupancy(1 - piece.color_id)
         else:
-            if (row, col) in self.valid_moves:
+            if (self.valid_mask >> (row * 8 + col)) & 1:
                 self.make_move(self.selected_pos, (row, col))
-                self.current_player = 'black' if self.current_player == 'white' else 'white'
                 
                 # After player move in engine mode, trigger engine move
                 if self.game_mode == 'Engine' and not self.game_over:
-                    self.make_engine_move()
+                    self.request_engine_move()
             
             self.selected_piece = None
             self.selected_pos = None
-            self.valid_moves = []
-            self.capture_moves = []
+            self.valid_mask = 0
+            self.capture_mask = 0
     
-    def make_engine_move(self):
-        if self.game_mode != 'Engine' or self.current_player == self.player_color:
+    def request_engine_move(self):
+        """Start the engine thinking on a worker thread; its move arrives as an ENGINE_MOVE_READY event"""
+        if self.game_mode != 'Engine' or self.side == self.player_side or self._engine_busy:
             return
         
-        engine = self.engine_manager.get_active_engine()
-        move_coords = engine.get_best_move(self)
+        self.resolve_checkmate(wait=True)
+        if self.game_over:
+            return
         
+        self._engine_busy = True
+        self.dirty = True
+        engine = self.engine_manager.get_active_engine()
+        self._engine_executor.submit(self._think, engine, PositionSnapshot(self), self._position_version)
+    
+    @staticmethod
+    def _think(engine, snapshot, version):
+        """Worker: search the snapshot and post the answer to the event queue"""
+        start = pygame.time.get_ticks()
+        try:
+            move = engine.get_best_move(snapshot)
+        except Exception as e:
+            print(f"Engine error: {e}")
+            move = None
+        remaining = ENGINE_MOVE_DELAY_MS - (pygame.time.get_ticks() - start)
+        if remaining > 0:
+            pygame.time.wait(remaining)  # Small delay for visual feedback
+        pygame.event.post(pygame.event.Event(ENGINE_MOVE_READY, move=move, version=version))
+    
+    def handle_engine_event(self, event):
+        """Play the move from an ENGINE_MOVE_READY event unless the position changed meanwhile"""
+        if event.version != self._position_version:
+            return
+        self._engine_busy = False
+        self.dirty = True
+        if self.game_mode == 'Engine' and self.side != self.player_side and not self.game_over:
+            self.apply_engine_move(event.move)
+    
+    def apply_engine_move(self, move_coords):
+        """Validate and play a move suggested by the engine"""
         if move_coords:
             from_pos, to_pos = move_coords
             # Validate the move is legal
-            piece = self.board[from_pos[0]][from_pos[1]]
-            if piece and piece.color == self.current_player:
-                valid_moves = piece.get_valid_moves(self.board)
-                if to_pos in valid_moves:
+            from_sq = square(*from_pos)
+            to_sq = square(*to_pos)
+            piece = self.board[from_sq]
+            if piece and piece.color_id == self.side:
+                targets = pseudo_legal_targets(self.bb, piece.color_id, piece.type_id, from_sq)
+                if (targets >> to_sq) & 1 and is_legal_move(self.bb, piece.color_id, piece.type_id,
+                                                            from_sq, to_sq, self.king_sq[piece.color_id]):
                     self.make_move(from_pos, to_pos)
-                    self.current_player = 'black' if self.current_player == 'white' else 'white'
     
     def handle_difficulty_click(self, pos):
         """Handle clicks in difficulty configuration panel"""
@@ -394,7 +600,7 @@ class ChessGame:
         
         # Difficulty slider area
         slider_x = panel_x + 20
-        slider_y = panel_y + 80
+        slider_y = panel_y + 60
         slider_width = 180
         slider_height = 20
         
@@ -410,23 +616,9 @@ class ChessGame:
                 self.apply_difficulty_settings()
             return True
         
-        # Preset buttons area
-        preset_y = panel_y + 120
-        button_width = 80
-        button_height = 25
-        spacing = 10
-        
-        presets = [
-            {'name': 'Easy', 'level': 5},
-            {'name': 'Medium', 'level': 10},
-            {'name': 'Hard', 'level': 15},
-            {'name': 'Maximum', 'level': 20}
-        ]
-        
-        for i, preset in enumerate(presets):
-            button_x = panel_x + 10 + i * (button_width + spacing)
-            if (button_x <= pos[0] <= button_x + button_width and
-                preset_y <= pos[1] <= preset_y + button_height):
+        # Preset buttons, hit-tested against the rects they are drawn with
+        for preset in self._preset_buttons:
+            if preset['rect'].collidepoint(pos):
                 self.difficulty_level = preset['level']
                 self.apply_difficulty_settings()
                 return True
@@ -437,9 +629,23 @@ class ChessGame:
         """Apply difficulty settings to the engine"""
         engine = self.engine_manager.get_active_engine()
         if engine and hasattr(engine, 'set_skill_level'):
-            engine.set_skill_level(self.difficulty_level)
+            # Queued behind any search in progress, so only the worker talks to the engine
+            self._engine_executor.submit(self._configure, engine, self.difficulty_level)
+            self._evaluation_cache.clear()
+            self._evaluation_pending.clear()
+            self._top_moves_cache.clear()
+            self._top_moves_pending.clear()
+            self._analyzed_key = None
             print(f"Difficulty set to level {self.difficulty_level}/20")
     
+    @staticmethod
+    def _configure(engine, level):
+        """Worker: apply a skill level between engine queries"""
+        try:
+            engine.set_skill_level(level)
+        except Exception as e:
+            print(f"Engine error: {e}")
+    
     def get_difficulty_name(self):
         """Get human-readable difficulty name"""
         if self.difficulty_level <= 5:
@@ -456,29 +662,109 @@ class ChessGame:
         if not self.show_analysis:
             return
         
+        # Nothing to do if this position was the last one analysed
+        key = self.position_key()
+        if key == self._analyzed_key:
+            return
+        self._analyzed_key = key
+        
         # Update analysis manager
         self.analysis_manager.update(self)
         
         # Get evaluation for probability widget
         engine = self.engine_manager.get_active_engine()
         if engine and engine.is_available():
-            evaluation = engine.get_evaluation(self)
-            if 'wdl' in evaluation:
-                self.win_probability_widget.update_probabilities(evaluation['wdl'])
+            evaluation = self.position_evaluation(engine)
+            if evaluation and evaluation.wdl is not None:
+                self.win_probability_widget.update_probabilities(evaluation.wdl)
                 self.win_probability_widget.update_animation()
     
+    def position_evaluation(self, engine):
+        """Cached evaluation of the current position; on a miss it is queued on the engine worker and None returned"""
+        key = self.position_key()
+        if key in self._evaluation_cache:
+            return self._evaluation_cache[key]
+        if key not in self._evaluation_pending:
+            self._evaluation_pending.add(key)
+            self._engine_executor.submit(self._evaluate, engine, PositionSnapshot(self), key)
+        return None
+    
+    def evaluation_pending(self):
+        """Whether the current position is waiting for its evaluation"""
+        return self.position_key() in self._evaluation_pending
+    
+    @staticmethod
+    def _evaluate(engine, snapshot, key):
+        """Worker: evaluate the snapshot and post the result to the event queue"""
+        try:
+            evaluation = engine.get_evaluation(snapshot)
+        except Exception as e:
+            print(f"Engine error: {e}")
+            evaluation = None
+        pygame.event.post(pygame.event.Event(EVALUATION_READY, key=key, evaluation=evaluation))
+    
+    def handle_evaluation_event(self, event):
+        """Store the evaluation from an EVALUATION_READY event, unless the cache was cleared meanwhile"""
+        if event.key not in self._evaluation_pending:
+            return
+        self._evaluation_pending.discard(event.key)
+        self._evaluation_cache[event.key] = event.evaluation
+        self.dirty = True
+        if event.key == self.position_key():
+            if event.evaluation and event.evaluation.wdl is not None:
+                self.win_probability_widget.update_probabilities(event.evaluation.wdl)
+            self.analysis_manager.update(self)
+    
+    def position_top_moves(self, engine, count):
+        """Cached best moves of the current position; on a miss they are queued on the engine worker and None returned"""
+        key = (self.position_key(), count)
+        if key in self._top_moves_cache:
+            return self._top_moves_cache[key]
+        if key not in self._top_moves_pending:
+            self._top_moves_pending.add(key)
+            self._engine_executor.submit(self._find_top_moves, engine, PositionSnapshot(self), key)
+        return None
+    
+    @staticmethod
+    def _find_top_moves(engine, snapshot, key):
+        """Worker: find the best moves of the snapshot and post them to the event queue"""
+        try:
+            top_moves = engine.get_top_moves(snapshot, key[1])
+        except Exception as e:
+            print(f"Engine error: {e}")
+            top_moves = []
+        pygame.event.post(pygame.event.Event(TOP_MOVES_READY, key=key, top_moves=top_moves))
+    
+    def handle_top_moves_event(self, event):
+        """Store the moves from a TOP_MOVES_READY event, unless the cache was cleared meanwhile"""
+        if event.key not in self._top_moves_pending:
+            return
+        self._top_moves_pending.discard(event.key)
+        self._top_moves_cache[event.key] = event.top_moves
+        self.dirty = True
+        if event.key[0] == self.position_key():
+            self.analysis_manager.update(self)
+    
     def make_move(self, from_pos, to_pos):
         from_row, from_col = from_pos
         to_row, to_col = to_pos
         
-        piece = self.board[from_row][from_col]
-        captured_piece = self.board[to_row][to_col]
+        from_sq = square(from_row, from_col)
+        to_sq = square(to_row, to_col)
+        piece = self.board[from_sq]
+        captured_piece = self.board[to_sq]
         
         # Record the move in algebraic notation
         move_notation = self.get_move_notation(piece, from_pos, to_pos, captured_piece)
         
-        self.board[to_row][to_col] = piece
-        self.board[from_row][from_col] = None
+        self.move_piece_bits(piece, from_sq, to_sq, captured_piece)
+        self.zobrist ^= ZOBRIST[piece.index][from_sq] ^ ZOBRIST[piece.index][to_sq]
+        if captured_piece:
+            self.zobrist ^= ZOBRIST[captured_piece.index][to_sq]
+        self._move_cache.clear()
+        self._position_version += 1
+        self.board[to_sq] = piece
+        self.board[from_sq] = None
         
         piece.row = to_row
         piece.col = to_col
@@ -486,22 +772,23 @@ class ChessGame:
         
         # Add move to history
         self.move_history.append(move_notation)
+        self.dirty = True
         
         # Check for checkmate after switching players
-        next_player = 'black' if self.current_player == 'white' else 'white'
+        next_id = 1 - self.side
         
         # Check if opponent is in check after this move
-        if self.is_in_check(next_player):
-            if self.is_checkmate(next_player):
-                self.game_over = True
-                self.winner = self.current_player
-                # Add checkmate notation
-                if len(self.move_history) > 0:
-                    self.move_history[-1] += '#'
-            else:
-                # Add check notation
-                if len(self.move_history) > 0:
-                    self.move_history[-1] += '+'
+        if self.king_attacked(next_id):
+            # Add check notation; the mate test runs on a worker thread and
+            # upgrades it to '#' once it finishes
+            if len(self.move_history) > 0:
+                self.move_history[-1] += '+'
+            self._mate_winner = self.current_player
+            self._mate_future = self._mate_executor.submit(
+                has_legal_move, list(self.bb), next_id, self.king_sq[next_id])
+        
+        # Hand the turn over before analysing, so the new position is the one queried
+        self.side = next_id
         
         # Update analysis after each move
         if self.show_analysis:
@@ -512,13 +799,13 @@ class ChessGame:
         to_row, to_col = to_pos
         
         # Convert positions to algebraic notation
-        to_square = chr(ord('a') + to_col) + str(8 - to_row)
+        to_square = SQUARE_NAMES[square(to_row, to_col)]
         
         piece_symbol = '' if piece.piece_type == 'pawn' else piece.piece_type[0].upper()
         capture_symbol = 'x' if captured_piece else ''
         
         if piece.piece_type == 'pawn' and captured_piece:
-            notation = f"{chr(ord('a') + from_col)}{capture_symbol}{to_square}"
+            notation = FILES[from_col] + capture_symbol + to_square
         else:
             notation = f"{piece_symbol}{capture_symbol}{to_square}"
         
@@ -527,77 +814,68 @@ class ChessGame:
         return notation
     
     def find_king(self, color):
-        for row in range(8):
-            for col in range(8):
-                piece = self.board[row][col]
-                if piece and piece.color == color and piece.piece_type == 'king':
-                    return (row, col)
-        return None
+        king_sq = self.king_sq[COLOR_IDS[color]]
+        return (king_sq >> 3, king_sq & 7)
+    
+    def legal_moves(self):
+        """Legal moves for the side to move, packed as from_sq << 6 | to_sq"""
+        color_id = self.side
+        return legal_moves(self.bb, color_id, self.king_sq[color_id])
     
     def is_in_check(self, color):
-        king_pos = self.find_king(color)
-        if not king_pos:
-            return False
-        
-        king_row, king_col = king_pos
-        
-        # Check if any opponent piece can attack the king
-        opponent_color = 'black' if color == 'white' else 'white'
-        for row in range(8):
-            for col in range(8):
-                piece = self.board[row][col]
-                if piece and piece.color == opponent_color:
-                    valid_moves = piece.get_valid_moves(self.board, check_for_check=False)
-                    if (king_row, king_col) in valid_moves:
-                        return True
-        return False
+        return self.king_attacked(COLOR_IDS[color])
+    
+    def position_key(self):
+        """Zobrist key of the placement and the side to move"""
+        return self.zobrist ^ ZOBRIST_BLACK_TO_MOVE if self.side else self.zobrist
+    
+    def checked_kings(self):
+        """Bitboard of the squares of kings in check, computed once per position"""
+        key, mask = self._check_cache
+        if key != self.zobrist:
+            mask = 0
+            for color_id in COLOR_IDS.values():
+                if self.king_attacked(color_id):
+                    mask |= 1 << self.king_sq[color_id]
+            self._check_cache = (self.zobrist, mask)
+        return mask
+    
+    def king_attacked(self, color_id):
+        """Check if the king of the given color id is attacked"""
+        return square_attacked_by(self.bb, self.king_sq[color_id], 1 - color_id, self.occ_all)
+    
+    def checkmate_pending(self):
+        """Check if a checkmate test is still running"""
+        return self._mate_future is not None
+    
+    def resolve_checkmate(self, wait=False):
+        """Apply the result of a finished checkmate test, optionally waiting for it"""
+        future = self._mate_future
+        if future is None or not (wait or future.done()):
+            return
+        self._mate_future = None
+        if not future.result():
+            self.game_over = True
+            self.winner = self._mate_winner
+            if len(self.move_history) > 0 and self.move_history[-1].endswith('+'):
+                self.move_history[-1] = self.move_history[-1][:-1] + '#'
+        self.dirty = True
     
     def is_checkmate(self, color):
         if not self.is_in_check(color):
             return False
         
-        # Try all possible moves for the player in check
-        for row in range(8):
-            for col in range(8):
-                piece = self.board[row][col]
-                if piece and piece.color == color:
-                    valid_moves = piece.get_valid_moves(self.board, check_for_check=True)
-                    if len(valid_moves) > 0:
-                        return False
-        
-        return True
+        color_id = COLOR_IDS[color]
+        return not has_legal_move(self.bb, color_id, self.king_sq[color_id])
     
     def draw(self, screen, font):
-        # Clear screen with dark background
-        screen.fill(DARK_GRAY)
+        # Draw the pre-rendered board, notation, menu bar and panel backgrounds
+        screen.blit(self._background, (0, 0))
         
-        # Draw menu bar
+        # Draw menu bar buttons
         self.draw_menu_bar(screen)
         
-        # Draw board notation
-        notation_font = pygame.font.Font(None, 24)
-        
-        # Draw column letters (a-h)
-        for col in range(8):
-            letter = chr(ord('a') + col)
-            text = notation_font.render(letter, True, TEXT_COLOR)
-            text_rect = text.get_rect(center=(MARGIN + col * SQUARE_SIZE + SQUARE_SIZE // 2, MENU_HEIGHT + MARGIN // 2))
-            screen.blit(text, text_rect)
-            text_rect = text.get_rect(center=(MARGIN + col * SQUARE_SIZE + SQUARE_SIZE // 2, WINDOW_HEIGHT - MARGIN // 2))
-            screen.blit(text, text_rect)
-        
-        # Draw row numbers (1-8)
-        for row in range(8):
-            number = str(8 - row)
-            text = notation_font.render(number, True, TEXT_COLOR)
-            text_rect = text.get_rect(center=(MARGIN // 2, MENU_HEIGHT + MARGIN + row * SQUARE_SIZE + SQUARE_SIZE // 2))
-            screen.blit(text, text_rect)
-        
-        # Draw side panel with dark theme
         panel_x = BOARD_SIZE + 2 * MARGIN
-        panel_rect = pygame.Rect(panel_x, MENU_HEIGHT, PANEL_WIDTH, WINDOW_HEIGHT - MENU_HEIGHT)
-        pygame.draw.rect(screen, LIGHT_GRAY, panel_rect)
-        pygame.draw.line(screen, BORDER_COLOR, (panel_x, MENU_HEIGHT), (panel_x, WINDOW_HEIGHT), 2)
         
         # Draw move history
         y_pos = self.draw_move_history(screen, panel_x)
@@ -610,107 +888,92 @@ class ChessGame:
         if self.show_difficulty_config:
             self.draw_difficulty_config(screen, panel_x)
         
-        # Draw board squares
-        for row in range(8):
-            for col in range(8):
-                color = LIGHT_BROWN if (row + col) % 2 == 0 else DARK_BROWN
-                rect = pygame.Rect(MARGIN + col * SQUARE_SIZE, MENU_HEIGHT + MARGIN + row * SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE)
-                pygame.draw.rect(screen, color, rect)
-                
-                if self.selected_pos == (row, col):
-                    pygame.draw.rect(screen, HIGHLIGHT_COLOR, rect, 5)
-                
-                # Check if this square contains a king in check
-                piece = self.board[row][col]
-                if piece and piece.piece_type == 'king' and self.is_in_check(piece.color):
-                    pygame.draw.rect(screen, CHECK_COLOR, rect, 8)
-                
-                if (row, col) in self.capture_moves:
-                    pygame.draw.rect(screen, CAPTURE_COLOR, rect, 5)
-                elif (row, col) in self.valid_moves:
-                    pygame.draw.circle(screen, VALID_MOVE_COLOR, 
-                                     (MARGIN + col * SQUARE_SIZE + SQUARE_SIZE // 2, 
-                                      MENU_HEIGHT + MARGIN + row * SQUARE_SIZE + SQUARE_SIZE // 2), 10)
-                
-                if piece is not None:
-                    image_key = (piece.color, piece.piece_type)
-                    if image_key in self.piece_images:
-                        image = self.piece_images[image_key]
-                        image_rect = image.get_rect(center=(MARGIN + col * SQUARE_SIZE + SQUARE_SIZE // 2,
-                                                          MENU_HEIGHT + MARGIN + row * SQUARE_SIZE + SQUARE_SIZE // 2))
-                        screen.blit(image, image_rect)
-                    else:
-                        symbol = self.get_piece_symbol(piece)
-                        text = font.render(symbol, True, BLACK)
-                        text_rect = text.get_rect(center=(MARGIN + col * SQUARE_SIZE + SQUARE_SIZE // 2,
-                                                        MENU_HEIGHT + MARGIN + row * SQUARE_SIZE + SQUARE_SIZE // 2))
-                        screen.blit(text, text_rect)
+        # Draw square highlights. Each one stays inside its own square, so
+        # drawing them kind by kind looks the same as square by square
+        square_rects = self._square_rects
+        square_centers = self._square_centers
+        draw_rect = pygame.draw.rect
+        if self.selected_pos is not None:
+            draw_rect(screen, HIGHLIGHT_COLOR, square_rects[square(*self.selected_pos)], 5)
+        
+        # Kings in check
+        for sq in iter_bits(self.checked_kings()):
+            draw_rect(screen, CHECK_COLOR, square_rects[sq], 8)
+        
+        for sq in iter_bits(self.capture_mask):
+            draw_rect(screen, CAPTURE_COLOR, square_rects[sq], 5)
+        for sq in iter_bits(self.valid_mask & ~self.capture_mask):
+            pygame.draw.circle(screen, VALID_MOVE_COLOR, square_centers[sq], 10)
+        
+        # Draw all pieces in one batched blit
+        board = self.board
+        piece_images = self.piece_images
+        piece_blits = []
+        for sq in iter_bits(self.occ_all):
+            piece = board[sq]
+            image = piece_images.get(piece.index)
+            if image is None:
+                image = render_text(font, self.get_piece_symbol(piece), BLACK)
+            piece_blits.append((image, image.get_rect(center=square_centers[sq])))
+        screen.blits(piece_blits, doreturn=False)
         
         # Draw game over message with better styling
         if self.game_over:
-            # Semi-transparent overlay
-            overlay = pygame.Surface((BOARD_SIZE, BOARD_SIZE))
-            overlay.set_alpha(180)
-            overlay.fill(BLACK)
-            screen.blit(overlay, (MARGIN, MENU_HEIGHT + MARGIN))
-            
-            # Winner announcement with shadow effect
-            winner_text = f"CHECKMATE!"
-            subtext = f"{self.winner.upper()} WINS"
-            
-            # Shadow for main text
-            shadow_surface = font.render(winner_text, True, BLACK)
-            shadow_rect = shadow_surface.get_rect(center=((BOARD_SIZE + 2 * MARGIN) // 2 + 2, (WINDOW_HEIGHT + MENU_HEIGHT) // 2 - 20 + 2))
-            screen.blit(shadow_surface, shadow_rect)
-            
-            # Main text
-            text_surface = font.render(winner_text, True, WHITE)
-            text_rect = text_surface.get_rect(center=((BOARD_SIZE + 2 * MARGIN) // 2, (WINDOW_HEIGHT + MENU_HEIGHT) // 2 - 20))
-            screen.blit(text_surface, text_rect)
-            
-            # Subtext
-            subtitle_font = pygame.font.Font(None, 48)
-            subtitle_surface = subtitle_font.render(subtext, True, (255, 215, 0))  # Gold color
-            subtitle_rect = subtitle_surface.get_rect(center=((BOARD_SIZE + 2 * MARGIN) // 2, (WINDOW_HEIGHT + MENU_HEIGHT) // 2 + 30))
-            screen.blit(subtitle_surface, subtitle_rect)
+            screen.blits(self._game_over_blits[self.winner], doreturn=False)
     
     def draw_move_history(self, screen, panel_x):
-        title_font = pygame.font.Font(None, 32)
-        move_font = pygame.font.Font(None, 22)
-        small_font = pygame.font.Font(None, 20)
-        
+        text_x = panel_x + 15
         y_pos = MENU_HEIGHT + 25
         
         # Title
-        title_text = title_font.render("Move History", True, TEXT_COLOR)
-        screen.blit(title_text, (panel_x + 15, y_pos))
+        screen.blit(self._history_title_surf, (text_x, y_pos))
         y_pos += 40
         
         # Current player indicator with better styling
         if self.game_over:
             player_text = f"Winner: {self.winner.upper()}"
             color = (100, 255, 100)  # Green for winner
+        elif self.checkmate_pending():
+            player_text = "Checking for mate..."
+            color = (200, 200, 200)
         else:
             if self.game_mode == 'Engine':
-                if self.current_player == self.player_color:
+                if self.side == self.player_side:
                     player_text = f"Your turn ({self.current_player.upper()})"
                 else:
                     player_text = f"Engine thinking..."
             else:
                 player_text = f"Turn: {self.current_player.upper()}"
-            color = (100, 150, 255) if self.current_player == 'white' else (255, 150, 100)
+            color = (100, 150, 255) if self.side == WHITE_ID else (255, 150, 100)
         
-        player_surface = move_font.render(player_text, True, color)
-        screen.blit(player_surface, (panel_x + 15, y_pos))
+        player_surface = render_text(self.move_font, player_text, color)
+        screen.blit(player_surface, (text_x, y_pos))
         y_pos += 25
         
         # Draw separator line
-        pygame.draw.line(screen, BORDER_COLOR, (panel_x + 15, y_pos), (panel_x + PANEL_WIDTH - 15, y_pos), 1)
+        pygame.draw.line(screen, BORDER_COLOR, (text_x, y_pos), (panel_x + PANEL_WIDTH - 15, y_pos), 1)
         y_pos += 15
+        
+        # The move list only changes when a move is made, so keep it rendered in between
+        if self.move_history != self._history_moves:
+            self._history_moves = list(self.move_history)
+            self._history_surf, self._history_rows = self.render_move_list(panel_x, y_pos)
+        screen.blit(self._history_surf, (text_x, y_pos))
+        y_pos += self._history_rows * 22
+        
+        return y_pos + 10
+    
+    def render_move_list(self, panel_x, top):
+        """Render the visible move pairs over a copy of the panel background, returning it and its row count"""
+        surface = self._background.subsurface(
+            (panel_x + 15, top, PANEL_WIDTH - 15, HISTORY_BOTTOM - top + 22)).copy()
+        y_pos = top
         max_visible_moves = 40
         start_index = max(0, len(self.move_history) - max_visible_moves)
         
-        # Display moves in pairs on the same line
+        # Display moves in pairs on the same line, blitted as one batch
+        line_blits = []
+        rows = 0
         i = start_index
         while i < len(self.move_history):
             move_number = (i // 2) + 1
@@ -723,137 +986,136 @@ class ChessGame:
             else:
                 line_text = f"{move_number}. {white_move}"
             
-            move_surface = small_font.render(line_text, True, TEXT_COLOR)
-            screen.blit(move_surface, (panel_x + 15, y_pos))
+            move_surface = self.small_font.render(line_text, True, TEXT_COLOR)
+            line_blits.append((move_surface, (0, y_pos - top)))
             
             y_pos += 22
+            rows += 1
             i += 2
             
             # Stop if we run out of space
-            if y_pos > WINDOW_HEIGHT - 200:
+            if y_pos > HISTORY_BOTTOM:
                 break
-        
-        return y_pos + 10
+        surface.blits(line_blits, doreturn=False)
+        return surface, rows
     
     def draw_analysis_panel(self, screen, panel_x, start_y):
         """Draw real-time analysis panel"""
-        font = pygame.font.Font(None, 24)
-        small_font = pygame.font.Font(None, 18)
+        text_x = panel_x + 15
+        font = self.panel_title_font
+        small_font = self.analysis_font
         
         y_pos = start_y
         
         # Analysis title
-        title_text = font.render("Real-time Analysis", True, TEXT_COLOR)
-        screen.blit(title_text, (panel_x + 15, y_pos))
+        title_text = render_text(font, "Real-time Analysis", TEXT_COLOR)
+        screen.blit(title_text, (text_x, y_pos))
         y_pos += 30
         
         # Draw separator line
-        pygame.draw.line(screen, BORDER_COLOR, (panel_x + 15, y_pos), (panel_x + PANEL_WIDTH - 15, y_pos), 1)
+        pygame.draw.line(screen, BORDER_COLOR, (text_x, y_pos), (panel_x + PANEL_WIDTH - 15, y_pos), 1)
         y_pos += 10
         
-        # Get current evaluation
+        # Get current evaluation, cached so the engine is not queried every frame
         engine = self.engine_manager.get_active_engine()
         if engine and engine.is_available():
-            evaluation = engine.get_evaluation(self)
+            evaluation = self.position_evaluation(engine)
             
             # Position evaluation
             if evaluation:
-                eval_text = self._format_evaluation_simple(evaluation)
-                eval_surface = small_font.render(f"Evaluation: {eval_text}", True, TEXT_COLOR)
-                screen.blit(eval_surface, (panel_x + 15, y_pos))
+                # Reformat only when the score changes
+                label_key = (evaluation.type, evaluation.value)
+                if label_key != self._eval_label_key:
+                    self._eval_label_key = label_key
+                    self._eval_label = f"Evaluation: {self._format_evaluation_simple(evaluation)}"
+                eval_surface = render_text(small_font, self._eval_label, TEXT_COLOR)
+                screen.blit(eval_surface, (text_x, y_pos))
                 y_pos += 20
                 
                 # Win probabilities with visual bars
-                if 'wdl' in evaluation:
-                    y_pos = self._draw_compact_probabilities(screen, panel_x, y_pos, evaluation['wdl'], small_font)
+                if evaluation.wdl is not None:
+                    y_pos = self._draw_compact_probabilities(screen, panel_x, y_pos, evaluation.wdl, small_font)
+            elif self.evaluation_pending():
+                pending_surface = render_text(small_font, "Evaluating...", (200, 200, 200))
+                screen.blit(pending_surface, (text_x, y_pos))
+                y_pos += 20
         
         return y_pos + 10
     
     def _format_evaluation_simple(self, evaluation):
         """Format evaluation for compact display"""
-        if 'type' in evaluation:
-            if evaluation['type'] == 'cp':
-                cp = evaluation.get('value', 0)
-                return f"{cp/100:+.2f}"
-            elif evaluation['type'] == 'mate':
-                mate = evaluation.get('value', 0)
-                return f"Mate in {abs(mate)}"
+        if evaluation.type == 'cp':
+            return f"{evaluation.value/100:+.2f}"
+        elif evaluation.type == 'mate':
+            return f"Mate in {abs(evaluation.value)}"
         return "0.00"
     
     def _draw_compact_probabilities(self, screen, panel_x, start_y, wdl_stats, font):
         """Draw compact probability visualization"""
-        if len(wdl_stats) != 3:
+        # The bar and the label only change with the evaluation
+        key = tuple(wdl_stats)
+        if key != self._wdl_key:
+            self._wdl_key = key
+            self._wdl_cache = self._build_compact_bar(wdl_stats)
+        if self._wdl_cache is None:
             return start_y
+        bar_surface, prob_text = self._wdl_cache
         
-        wins, draws, losses = wdl_stats
-        total = wins + draws + losses
-        
-        if total == 0:
-            return start_y
-        
-        # Calculate percentages
-        win_pct = (wins / total) * 100
-        draw_pct = (draws / total) * 100
-        loss_pct = (losses / total) * 100
-        
+        text_x = panel_x + 15
         y_pos = start_y
         
         # Title
-        title = font.render("Probabilities:", True, TEXT_COLOR)
-        screen.blit(title, (panel_x + 15, y_pos))
+        title = render_text(font, "Probabilities:", TEXT_COLOR)
+        screen.blit(title, (text_x, y_pos))
         y_pos += 20
         
-        # Compact bar
-        bar_width = PANEL_WIDTH - 40
-        bar_height = 15
-        bar_x = panel_x + 15
-        
-        # Background
-        bg_rect = pygame.Rect(bar_x, y_pos, bar_width, bar_height)
-        pygame.draw.rect(screen, (30, 30, 30), bg_rect)
-        pygame.draw.rect(screen, BORDER_COLOR, bg_rect, 1)
+        # Compact bar, pre-rendered for this evaluation
+        screen.blit(bar_surface, (text_x, y_pos))
+        y_pos += 25
         
-        # Segments
-        current_x = bar_x
+        # Percentage text
+        prob_surface = render_text(font, prob_text, TEXT_COLOR)
+        screen.blit(prob_surface, (text_x, y_pos))
+        y_pos += 20
         
-        # White segment
+        return y_pos
+    
+    def _build_compact_bar(self, wdl_stats):
+        """Render the compact probability bar and format its percentage label"""
+        percentages = wdl_percentages(wdl_stats)
+        if percentages is None:
+            return None
+        win_pct, draw_pct, loss_pct = percentages
+        
+        bar_width = PROB_BAR_WIDTH
+        bar_height = 15
         white_width = int((win_pct / 100) * bar_width)
-        if white_width > 0:
-            white_rect = pygame.Rect(current_x, y_pos, white_width, bar_height)
-            pygame.draw.rect(screen, (200, 200, 200), white_rect)
-            current_x += white_width
-        
-        # Draw segment
         draw_width = int((draw_pct / 100) * bar_width)
-        if draw_width > 0:
-            draw_rect = pygame.Rect(current_x, y_pos, draw_width, bar_height)
-            pygame.draw.rect(screen, (200, 200, 0), draw_rect)
-            current_x += draw_width
-        
-        # Black segment
         black_width = int((loss_pct / 100) * bar_width)
-        if black_width > 0:
-            black_rect = pygame.Rect(current_x, y_pos, black_width, bar_height)
-            pygame.draw.rect(screen, (80, 80, 80), black_rect)
-        
-        y_pos += 25
         
-        # Percentage text
-        prob_text = f"W:{win_pct:.0f}% D:{draw_pct:.0f}% B:{loss_pct:.0f}%"
-        prob_surface = font.render(prob_text, True, TEXT_COLOR)
-        screen.blit(prob_surface, (panel_x + 15, y_pos))
-        y_pos += 20
+        # Background and border, then the white, draw and black segments left to right
+        bar_surface = pygame.Surface((bar_width, bar_height)).convert()
+        bar_surface.fill((30, 30, 30))
+        pygame.draw.rect(bar_surface, BORDER_COLOR, bar_surface.get_rect(), 1)
+        bar_surface.fill((200, 200, 200), (0, 0, white_width, bar_height))
+        bar_surface.fill((200, 200, 0), (white_width, 0, draw_width, bar_height))
+        bar_surface.fill((80, 80, 80), (white_width + draw_width, 0, black_width, bar_height))
         
-        return y_pos
+        return bar_surface, f"W:{win_pct:.0f}% D:{draw_pct:.0f}% B:{loss_pct:.0f}%"
     
     def draw_menu_bar(self, screen):
-        # Draw menu bar background
-        menu_rect = pygame.Rect(0, 0, WINDOW_WIDTH, MENU_HEIGHT)
-        pygame.draw.rect(screen, LIGHT_GRAY, menu_rect)
-        pygame.draw.line(screen, BORDER_COLOR, (0, MENU_HEIGHT), (WINDOW_WIDTH, MENU_HEIGHT), 2)
-        
-        # Draw buttons
-        button_font = pygame.font.Font(None, 20)
+        # The bar only changes with the mode toggles, so keep it rendered until one flips
+        key = (self.game_mode, self.show_difficulty_config, self.show_analysis,
+               self.engine_manager.is_engine_available('stockfish'))
+        if key != self._menu_key:
+            self._menu_surf = self.render_menu_bar()
+            self._menu_key = key
+        screen.blit(self._menu_surf, (0, 0))
+    
+    def render_menu_bar(self):
+        """Render the menu bar buttons over a copy of the bar background"""
+        surface = self._background.subsurface((0, 0, WINDOW_WIDTH, MENU_HEIGHT)).copy()
+        text_blits = []
         for button in self.buttons:
             # Highlight active mode buttons
             if button['action'] == 'pvp' and self.game_mode == 'PvP':
@@ -870,37 +1132,31 @@ class ChessGame:
             # Disable engine button if Stockfish not available
             if button['action'] == 'engine' and not self.engine_manager.is_engine_available('stockfish'):
                 button_color = (50, 50, 50)
-                text_color = (100, 100, 100)
+                text_color = BUTTON_DISABLED_TEXT
             else:
                 text_color = BUTTON_TEXT
             
             # Draw button background
-            pygame.draw.rect(screen, button_color, button['rect'])
-            pygame.draw.rect(screen, BORDER_COLOR, button['rect'], 1)
+            pygame.draw.rect(surface, button_color, button['rect'])
+            pygame.draw.rect(surface, BORDER_COLOR, button['rect'], 1)
             
-            # Draw button text
-            text_surface = button_font.render(button['text'], True, text_color)
-            text_rect = text_surface.get_rect(center=button['rect'].center)
-            screen.blit(text_surface, text_rect)
+            # Queue button text; all labels are blitted in one batch
+            text_surface = self._button_text_surfs[(button['text'], text_color)]
+            text_blits.append((text_surface, text_surface.get_rect(center=button['rect'].center)))
+        surface.blits(text_blits, doreturn=False)
+        return surface
     
     def draw_difficulty_config(self, screen, panel_x):
         """Draw difficulty configuration panel"""
         config_y = MENU_HEIGHT + 100
-        font = pygame.font.Font(None, 24)
-        small_font = pygame.font.Font(None, 20)
-        
-        # Background for config panel
-        config_rect = pygame.Rect(panel_x + 5, config_y, PANEL_WIDTH - 10, 200)
-        pygame.draw.rect(screen, (50, 50, 50), config_rect)
-        pygame.draw.rect(screen, BORDER_COLOR, config_rect, 2)
+        small_font = self.small_font
         
-        # Title
-        title = font.render("Difficulty Configuration", True, TEXT_COLOR)
-        screen.blit(title, (panel_x + 10, config_y + 10))
+        # Panel frame, title and slider track, pre-rendered in build_config_surface
+        screen.blit(self._config_surf, (panel_x + 5, config_y))
         
         # Current difficulty level
         difficulty_name = self.get_difficulty_name()
-        difficulty_text = small_font.render(f"Level: {self.difficulty_level}/20 ({difficulty_name})", True, TEXT_COLOR)
+        difficulty_text = render_text(small_font, f"Level: {self.difficulty_level}/20 ({difficulty_name})", TEXT_COLOR)
         screen.blit(difficulty_text, (panel_x + 10, config_y + 35))
         
         # Difficulty slider
@@ -909,26 +1165,13 @@ class ChessGame:
         slider_width = 180
         slider_height = 20
         
-        # Slider background
-        slider_bg = pygame.Rect(slider_x, slider_y, slider_width, slider_height)
-        pygame.draw.rect(screen, (30, 30, 30), slider_bg)
-        pygame.draw.rect(screen, BORDER_COLOR, slider_bg, 1)
-        
         # Slider fill
         fill_width = int((self.difficulty_level / 20) * slider_width)
         if fill_width > 0:
             fill_rect = pygame.Rect(slider_x, slider_y, fill_width, slider_height)
             
-            # Color based on difficulty
-            if self.difficulty_level <= 5:
-                color = (100, 255, 100)  # Green for easy
-            elif self.difficulty_level <= 10:
-                color = (255, 255, 100)  # Yellow for medium
-            elif self.difficulty_level <= 15:
-                color = (255, 150, 100)  # Orange for hard
-            else:
-                color = (255, 100, 100)  # Red for maximum
-            
+            # Green, yellow, orange or red depending on difficulty
+            color = DIFFICULTY_COLORS[(self.difficulty_level - 1) // 5]
             pygame.draw.rect(screen, color, fill_rect)
         
         # Slider handle
@@ -937,49 +1180,31 @@ class ChessGame:
         pygame.draw.rect(screen, WHITE, handle_rect)
         pygame.draw.rect(screen, BLACK, handle_rect, 1)
         
-        # Preset buttons
-        preset_y = config_y + 100
-        button_width = 50
-        button_height = 25
-        spacing = 5
-        
-        presets = [
-            {'name': 'Easy', 'level': 5, 'color': (100, 255, 100)},
-            {'name': 'Medium', 'level': 10, 'color': (255, 255, 100)},
-            {'name': 'Hard', 'level': 15, 'color': (255, 150, 100)},
-            {'name': 'Maximum', 'level': 20, 'color': (255, 100, 100)}
-        ]
-        
-        for i, preset in enumerate(presets):
-            button_x = panel_x + 10 + i * (button_width + spacing)
-            button_rect = pygame.Rect(button_x, preset_y, button_width, button_height)
+        # Preset buttons, laid out and rendered in setup_preset_buttons
+        for preset in self._preset_buttons:
+            button_rect = preset['rect']
             
             # Highlight if current level
             if self.difficulty_level == preset['level']:
                 pygame.draw.rect(screen, preset['color'], button_rect)
-                text_color = BLACK
+                text = preset['active_text']
             else:
                 pygame.draw.rect(screen, BUTTON_COLOR, button_rect)
-                text_color = BUTTON_TEXT
+                text = preset['inactive_text']
             
             pygame.draw.rect(screen, BORDER_COLOR, button_rect, 1)
-            
-            # Button text
-            button_font = pygame.font.Font(None, 16)
-            text = button_font.render(preset['name'], True, text_color)
-            text_rect = text.get_rect(center=button_rect.center)
-            screen.blit(text, text_rect)
+            screen.blit(text, preset['text_rect'])
         
         # ELO estimation
         estimated_elo = 800 + (self.difficulty_level * 100)
-        elo_text = small_font.render(f"Estimated ELO: ~{estimated_elo}", True, TEXT_COLOR)
+        elo_text = render_text(small_font, f"Estimated ELO: ~{estimated_elo}", TEXT_COLOR)
         screen.blit(elo_text, (panel_x + 10, config_y + 140))
         
         # Engine info
         engine = self.engine_manager.get_active_engine()
         if hasattr(engine, 'get_engine_info'):
             info = engine.get_engine_info()
-            engine_text = small_font.render(f"Engine: {info.get('name', 'N/A')}", True, TEXT_COLOR)
+            engine_text = render_text(small_font, f"Engine: {info.get('name', 'N/A')}", TEXT_COLOR)
             screen.blit(engine_text, (panel_x + 10, config_y + 160))
 
 def main():
@@ -992,24 +1217,40 @@ def main():
     
     running = True
     while running:
-        for event in pygame.event.get():
+        # Sleep until an event arrives instead of spinning through identical frames,
+        # but keep polling while a checkmate test is running
+        wait_ms = 1 if game.checkmate_pending() else IDLE_WAIT_MS
+        events = [pygame.event.wait(wait_ms)] + pygame.event.get()
+        for event in events:
             if event.type == pygame.QUIT:
                 running = False
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 if event.button == 1:  # Left click
                     game.handle_click(event.pos)
+            elif event.type == ENGINE_MOVE_READY:
+                game.handle_engine_event(event)
+            elif event.type == EVALUATION_READY:
+                game.handle_evaluation_event(event)
+            elif event.type == TOP_MOVES_READY:
+                game.handle_top_moves_event(event)
+            elif event.type == pygame.VIDEOEXPOSE:
+                game.dirty = True
+        
+        game.resolve_checkmate()
         
-        # Auto-make engine move if it's engine's turn
-        if game.game_mode == 'Engine' and game.current_player != game.player_color and not game.game_over:
-            pygame.time.wait(500)  # Small delay for visual feedback
-            game.make_engine_move()
+        # Let the engine start thinking if it's engine's turn
+        if game.game_mode == 'Engine' and game.side != game.player_side and not game.game_over:
+            game.request_engine_move()
         
         # Update win probability widget animation
         if game.show_analysis:
             game.win_probability_widget.update_animation()
         
-        game.draw(screen, font)
-        pygame.display.flip()
+        # Only redraw when something changed
+        if game.dirty:
+            game.draw(screen, font)
+            pygame.display.flip()
+            game.dirty = False
         clock.tick(60)
     
     pygame.quit()
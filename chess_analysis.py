@@ -4,8 +4,23 @@ Provides analysis features using chess engines
 """
 
 import pygame
-from typing import List, Dict, Any, Optional
-from chess_engine_adapter import ChessEngineManager
+from typing import List, Dict, Any, Optional, Tuple
+from chess_engine_adapter import ChessEngineManager, Evaluation, MoveInfo
+from text_cache import get_font, render_text
+
+
+def wdl_percentages(wdl_stats: List[int]) -> Optional[Tuple[float, float, float]]:
+    """White win, draw and black win percentages from WDL stats, or None if they are unusable"""
+    if len(wdl_stats) != 3:
+        return None
+    
+    wins, draws, losses = wdl_stats
+    total = wins + draws + losses
+    
+    if total == 0:
+        return None
+    
+    return (wins / total) * 100, (draws / total) * 100, (losses / total) * 100
 
 
 class ChessAnalysisPanel:
@@ -14,9 +29,13 @@ class ChessAnalysisPanel:
     def __init__(self, engine_manager: ChessEngineManager):
         self.engine_manager = engine_manager
         self.show_analysis = False
-        self.current_evaluation = {}
+        self.current_evaluation = None
         self.top_moves = []
         self.analysis_depth = 10
+        self._eval_label = ""  # Formatted evaluation line, refreshed in update_analysis
+        self._move_labels = []  # Formatted lines for the shown top moves
+        self._wdl_key = None  # (WDL stats, bar width) that _wdl_cache was computed for
+        self._wdl_cache = None  # ((bar width, label) per outcome), or None when there is nothing to show
     
     def toggle_analysis(self):
         """Toggle analysis display"""
@@ -29,74 +48,80 @@ class ChessAnalysisPanel:
         
         engine = self.engine_manager.get_active_engine()
         if engine and engine.is_available():
-            self.current_evaluation = engine.get_evaluation(board_state)
-            self.top_moves = engine.get_top_moves(board_state, 5)
+            # Both are queried on the engine worker; on a miss the board state
+            # calls back here once the result has arrived
+            self.current_evaluation = board_state.position_evaluation(engine)
+            self.top_moves = board_state.position_top_moves(engine, 5) or []
+            
+            # Format once per update instead of on every frame
+            if self.current_evaluation:
+                self._eval_label = f"Evaluation: {self._format_evaluation(self.current_evaluation)}"
+            else:
+                self._eval_label = ""  # Pending; never show the previous position's score
+            self._move_labels = [self._format_move(move_data, i + 1)
+                                 for i, move_data in enumerate(self.top_moves[:3])]
     
     def draw_analysis(self, screen, panel_x, start_y, panel_width):
         """Draw analysis information"""
         if not self.show_analysis:
             return start_y
         
-        font = pygame.font.Font(None, 24)
-        small_font = pygame.font.Font(None, 20)
+        font = get_font(24)
+        small_font = get_font(20)
         color = (220, 220, 220)
         
         y_pos = start_y
         
         # Analysis title
-        title = font.render("Engine Analysis", True, color)
+        title = render_text(font, "Engine Analysis", color)
         screen.blit(title, (panel_x + 10, y_pos))
         y_pos += 30
         
         # Current evaluation
         if self.current_evaluation:
-            eval_text = self._format_evaluation(self.current_evaluation)
-            eval_surface = small_font.render(f"Evaluation: {eval_text}", True, color)
+            eval_surface = render_text(small_font, self._eval_label, color)
             screen.blit(eval_surface, (panel_x + 10, y_pos))
             y_pos += 25
             
             # Win probability (WDL stats)
-            if 'wdl' in self.current_evaluation:
+            if self.current_evaluation.wdl is not None:
                 y_pos = self._draw_win_probability(screen, panel_x, y_pos, panel_width, 
-                                                  self.current_evaluation['wdl'], small_font)
+                                                  self.current_evaluation.wdl, small_font)
         
         # Top moves
         if self.top_moves:
-            moves_title = small_font.render("Best moves:", True, color)
+            moves_title = render_text(small_font, "Best moves:", color)
             screen.blit(moves_title, (panel_x + 10, y_pos))
             y_pos += 20
             
-            for i, move_data in enumerate(self.top_moves[:3]):
-                move_text = self._format_move(move_data, i + 1)
-                move_surface = small_font.render(move_text, True, color)
-                screen.blit(move_surface, (panel_x + 15, y_pos))
+            move_blits = []
+            for move_text in self._move_labels:
+                move_surface = render_text(small_font, move_text, color)
+                move_blits.append((move_surface, (panel_x + 15, y_pos)))
                 y_pos += 18
+            screen.blits(move_blits, doreturn=False)
         
         return y_pos + 10
     
-    def _format_evaluation(self, evaluation: Dict[str, Any]) -> str:
+    def _format_evaluation(self, evaluation: Evaluation) -> str:
         """Format evaluation for display"""
-        if 'type' in evaluation:
-            if evaluation['type'] == 'cp':
-                # Centipawn evaluation
-                cp = evaluation.get('value', 0)
-                return f"{cp/100:.2f}"
-            elif evaluation['type'] == 'mate':
-                # Mate in N moves
-                mate = evaluation.get('value', 0)
-                return f"Mate in {abs(mate)}"
+        if evaluation.type == 'cp':
+            # Centipawn evaluation
+            return f"{evaluation.value/100:.2f}"
+        elif evaluation.type == 'mate':
+            # Mate in N moves
+            return f"Mate in {abs(evaluation.value)}"
         
         return "0.00"
     
-    def _format_move(self, move_data: Dict[str, Any], rank: int) -> str:
+    def _format_move(self, move_data: MoveInfo, rank: int) -> str:
         """Format move for display"""
-        uci = move_data.get('uci', '')
+        uci = move_data.uci
         
-        if move_data.get('mate') is not None:
-            eval_str = f"M{abs(move_data['mate'])}"
-        elif move_data.get('centipawn') is not None:
-            cp = move_data['centipawn']
-            eval_str = f"{cp/100:+.2f}"
+        if move_data.mate is not None:
+            eval_str = f"M{abs(move_data.mate)}"
+        elif move_data.centipawn is not None:
+            eval_str = f"{move_data.centipawn/100:+.2f}"
         else:
             eval_str = "0.00"
         
@@ -104,19 +129,10 @@ class ChessAnalysisPanel:
     
     def _format_win_probability(self, wdl_stats: List[int]) -> List[str]:
         """Format WDL (Win/Draw/Loss) statistics for display"""
-        if len(wdl_stats) != 3:
-            return ["Probabilities: N/A"]
-        
-        wins, draws, losses = wdl_stats
-        total = wins + draws + losses
-        
-        if total == 0:
+        percentages = wdl_percentages(wdl_stats)
+        if percentages is None:
             return ["Probabilities: N/A"]
-        
-        # Calculate percentages
-        win_pct = (wins / total) * 100
-        draw_pct = (draws / total) * 100
-        loss_pct = (losses / total) * 100
+        win_pct, draw_pct, loss_pct = percentages
         
         return [
             f"Probabilities:",
@@ -128,36 +144,31 @@ class ChessAnalysisPanel:
     def _draw_win_probability(self, screen, panel_x: int, start_y: int, 
                             panel_width: int, wdl_stats: List[int], font) -> int:
         """Draw win probability with visual bars"""
-        if len(wdl_stats) != 3:
-            return start_y
-        
-        wins, draws, losses = wdl_stats
-        total = wins + draws + losses
+        bar_width = panel_width - 40
+        bar_height = 12
         
-        if total == 0:
+        # Percentages, bar widths and labels only change with the evaluation
+        key = (tuple(wdl_stats), bar_width)
+        if key != self._wdl_key:
+            self._wdl_key = key
+            self._wdl_cache = self._wdl_layout(wdl_stats, bar_width)
+        if self._wdl_cache is None:
             return start_y
-        
-        # Calculate percentages
-        win_pct = (wins / total) * 100
-        draw_pct = (draws / total) * 100
-        loss_pct = (losses / total) * 100
+        (white_bar_width, white_label), (draw_bar_width, draw_label), (black_bar_width, black_label) = self._wdl_cache
         
         y_pos = start_y
-        bar_width = panel_width - 40
-        bar_height = 12
         
         # Title
-        title = font.render("Win probabilities:", True, (220, 220, 220))
+        title = render_text(font, "Win probabilities:", (220, 220, 220))
         screen.blit(title, (panel_x + 10, y_pos))
         y_pos += 25
         
         # White wins bar
-        white_text = font.render(f"White: {win_pct:.1f}%", True, (220, 220, 220))
+        white_text = render_text(font, white_label, (220, 220, 220))
         screen.blit(white_text, (panel_x + 10, y_pos))
         y_pos += 18
         
         # White bar
-        white_bar_width = int((win_pct / 100) * bar_width)
         white_rect = pygame.Rect(panel_x + 10, y_pos, white_bar_width, bar_height)
         pygame.draw.rect(screen, (200, 200, 200), white_rect)  # Light gray for white
         pygame.draw.rect(screen, (100, 100, 100), 
@@ -165,12 +176,11 @@ class ChessAnalysisPanel:
         y_pos += 18
         
         # Draw bar
-        draw_text = font.render(f"Draw: {draw_pct:.1f}%", True, (220, 220, 220))
+        draw_text = render_text(font, draw_label, (220, 220, 220))
         screen.blit(draw_text, (panel_x + 10, y_pos))
         y_pos += 18
         
         # Draw bar
-        draw_bar_width = int((draw_pct / 100) * bar_width)
         draw_rect = pygame.Rect(panel_x + 10, y_pos, draw_bar_width, bar_height)
         pygame.draw.rect(screen, (150, 150, 0), draw_rect)  # Yellow for draw
         pygame.draw.rect(screen, (100, 100, 100), 
@@ -178,12 +188,11 @@ class ChessAnalysisPanel:
         y_pos += 18
         
         # Black wins bar
-        black_text = font.render(f"Black: {loss_pct:.1f}%", True, (220, 220, 220))
+        black_text = render_text(font, black_label, (220, 220, 220))
         screen.blit(black_text, (panel_x + 10, y_pos))
         y_pos += 18
         
         # Black bar
-        black_bar_width = int((loss_pct / 100) * bar_width)
         black_rect = pygame.Rect(panel_x + 10, y_pos, black_bar_width, bar_height)
         pygame.draw.rect(screen, (80, 80, 80), black_rect)  # Dark gray for black
         pygame.draw.rect(screen, (100, 100, 100), 
@@ -191,6 +200,17 @@ class ChessAnalysisPanel:
         y_pos += 25
         
         return y_pos
+    
+    def _wdl_layout(self, wdl_stats: List[int], bar_width: int):
+        """Bar width and label for each of white wins, draws and black wins"""
+        percentages = wdl_percentages(wdl_stats)
+        if percentages is None:
+            return None
+        win_pct, draw_pct, loss_pct = percentages
+        
+        return ((int((win_pct / 100) * bar_width), f"White: {win_pct:.1f}%"),
+                (int((draw_pct / 100) * bar_width), f"Draw: {draw_pct:.1f}%"),
+                (int((loss_pct / 100) * bar_width), f"Black: {loss_pct:.1f}%"))
 
 
 class EngineSettingsPanel:
@@ -211,14 +231,14 @@ class EngineSettingsPanel:
         if not self.show_settings:
             return start_y
         
-        font = pygame.font.Font(None, 24)
-        small_font = pygame.font.Font(None, 20)
+        font = get_font(24)
+        small_font = get_font(20)
         color = (220, 220, 220)
         
         y_pos = start_y
         
         # Settings title
-        title = font.render("Engine Configuration", True, color)
+        title = render_text(font, "Engine Configuration", color)
         screen.blit(title, (panel_x + 10, y_pos))
         y_pos += 30
         
@@ -226,22 +246,22 @@ class EngineSettingsPanel:
         engine = self.engine_manager.get_active_engine()
         if hasattr(engine, 'get_engine_info'):
             info = engine.get_engine_info()
-            name_text = small_font.render(f"Engine: {info.get('name', 'Unknown')}", True, color)
+            name_text = render_text(small_font, f"Engine: {info.get('name', 'Unknown')}", color)
             screen.blit(name_text, (panel_x + 10, y_pos))
             y_pos += 20
             
             if 'version' in info:
-                version_text = small_font.render(f"Version: {info['version']}", True, color)
+                version_text = render_text(small_font, f"Version: {info['version']}", color)
                 screen.blit(version_text, (panel_x + 10, y_pos))
                 y_pos += 20
         
         # Skill level
-        skill_text = small_font.render(f"Level: {self.skill_level}/20", True, color)
+        skill_text = render_text(small_font, f"Level: {self.skill_level}/20", color)
         screen.blit(skill_text, (panel_x + 10, y_pos))
         y_pos += 20
         
         # Depth
-        depth_text = small_font.render(f"Depth: {self.depth}", True, color)
+        depth_text = render_text(small_font, f"Depth: {self.depth}", color)
         screen.blit(depth_text, (panel_x + 10, y_pos))
         y_pos += 25
         
@@ -3,8 +3,14 @@ Chess Engine Adapter
 Implements the Adapter pattern to separate engine logic from UI
 """
 
+import re
+import shutil
+import threading
 from abc import ABC, abstractmethod
-from typing import Optional, Tuple, List, Dict, Any, TYPE_CHECKING
+from collections import OrderedDict
+from typing import NamedTuple, Optional, Tuple, List, Dict, Any, TYPE_CHECKING
+
+from bitboard import SQUARE_NAMES, WHITE_ID, BLACK_ID, KING, square_attacked_by
 
 if TYPE_CHECKING:
     from chess import ChessGame
@@ -15,6 +21,82 @@ try:
 except ImportError:
     STOCKFISH_AVAILABLE = False
 
+STOCKFISH_PATHS = (
+    "stockfish",  # If in PATH
+    "/usr/bin/stockfish",
+    "/usr/local/bin/stockfish",
+    "/opt/homebrew/bin/stockfish",  # macOS Homebrew
+    "C:\\Program Files\\Stockfish\\stockfish.exe",  # Windows
+    "./stockfish",  # Local directory
+)
+FEN_CACHE_SIZE = 128  # FEN strings kept before the least recently used is dropped
+FEN_PIECE_CHARS = 'PNBRQKpnbrqk'  # FEN letter per bitboard index (color * 6 + piece type)
+FEN_PIECE_INDEX = {char: index for index, char in enumerate(FEN_PIECE_CHARS)}  # FEN letter -> bitboard index
+EMPTY_RUNS = tuple(str(n) for n in range(9))  # FEN digit for a run of n empty squares
+SQUARE_COORDINATES = {name: (sq >> 3, sq & 7) for sq, name in enumerate(SQUARE_NAMES)}  # 'e2' -> (row, col)
+FEN_PATTERN = re.compile(r'(?:[1-8pnbrqkPNBRQK]{1,8}/){7}[1-8pnbrqkPNBRQK]{1,8} [wb] (?:-|(?=\S)K?Q?k?q?) (?:-|[a-h][36]) \d+ \d+')
+
+
+def is_fen_playable(fen: str) -> bool:
+    """Local check that a FEN is well formed and safe to hand to Stockfish"""
+    if not FEN_PATTERN.fullmatch(fen):
+        return False
+    
+    # Stockfish needs exactly one king per side and no pawns on the back ranks
+    placement, active_color = fen.split(' ', 2)[:2]
+    ranks = placement.split('/')
+    if placement.count('K') != 1 or placement.count('k') != 1:
+        return False
+    if any(pawn in ranks[0] or pawn in ranks[7] for pawn in 'Pp'):
+        return False
+    
+    # Build the bitboards, rejecting ranks that do not cover exactly eight squares
+    bb = [0] * 12
+    for row, rank in enumerate(ranks):
+        sq = row * 8
+        for char in rank:
+            if char.isdigit():
+                sq += int(char)
+            else:
+                if sq >= row * 8 + 8:
+                    return False
+                bb[FEN_PIECE_INDEX[char]] |= 1 << sq
+                sq += 1
+        if sq != row * 8 + 8:
+            return False
+    
+    # The side not to move must not be in check, or Stockfish may crash on the position
+    waiting = BLACK_ID if active_color == 'w' else WHITE_ID
+    occupancy = 0
+    for pieces in bb:
+        occupancy |= pieces
+    king_sq = bb[waiting * 6 + KING].bit_length() - 1
+    return not square_attacked_by(bb, king_sq, 1 - waiting, occupancy)
+
+
+def find_stockfish() -> Optional[str]:
+    """First Stockfish binary found on PATH or at a known install location, without starting it"""
+    for path in STOCKFISH_PATHS:
+        found = shutil.which(path)
+        if found:
+            return found
+    return None
+
+
+class Evaluation(NamedTuple):
+    """Engine evaluation of a position"""
+    type: str  # 'cp' for centipawns or 'mate' for moves to mate
+    value: int
+    wdl: Optional[List[int]] = None  # White wins, draws and black wins per mille, if the engine reports them
+
+
+class MoveInfo(NamedTuple):
+    """One of the engine's candidate moves with its score"""
+    move: Tuple[Tuple[int, int], Tuple[int, int]]
+    uci: str
+    centipawn: Optional[int]
+    mate: Optional[int]
+
 
 class ChessEngineInterface(ABC):
     """Abstract interface for chess engines"""
@@ -30,13 +112,13 @@ class ChessEngineInterface(ABC):
         pass
     
     @abstractmethod
-    def get_top_moves(self, board_state: 'ChessGame', count: int = 3) -> List[Dict[str, Any]]:
+    def get_top_moves(self, board_state: 'ChessGame', count: int = 3) -> List[MoveInfo]:
         """Get the top N moves with their evaluations"""
         pass
     
     @abstractmethod
-    def get_evaluation(self, board_state: 'ChessGame') -> Dict[str, Any]:
-        """Get position evaluation"""
+    def get_evaluation(self, board_state: 'ChessGame') -> Optional[Evaluation]:
+        """Get position evaluation, or None if the engine cannot evaluate it"""
         pass
     
     @abstractmethod
@@ -57,6 +139,11 @@ class StockfishAdapter(ChessEngineInterface):
         self.engine = None
         self.current_depth = 10
         self.current_skill = 20
+        self._fen_cache = OrderedDict()  # (position key, move number) -> FEN
+        self._loaded_fen = None  # Position Stockfish currently has set
+        self._has_wdl = False  # Engine reports WDL stats; cleared the first time they fail
+        self._lock = threading.Lock()  # One conversation with the Stockfish process at a time
+        self._version = "Not available"  # Read once at startup, so drawing never waits on the engine
         self._initialize_engine()
     
     def _initialize_engine(self) -> None:
@@ -65,33 +152,38 @@ class StockfishAdapter(ChessEngineInterface):
             print("Stockfish library not available")
             return
         
-        stockfish_paths = [
-            "stockfish",  # If in PATH
-            "/usr/bin/stockfish",
-            "/usr/local/bin/stockfish",
-            "/opt/homebrew/bin/stockfish",  # macOS Homebrew
-            "C:\\Program Files\\Stockfish\\stockfish.exe",  # Windows
-            "./stockfish",  # Local directory
-        ]
-        
-        for path in stockfish_paths:
-            try:
-                self.engine = Stockfish(path=path)
-                self.engine.set_depth(10)
-                print(f"Stockfish initialized with path: {path}")
-                return
-            except Exception:
-                continue
+        path = find_stockfish()
+        if path is None:
+            print("Failed to initialize Stockfish: binary not found")
+            return
         
-        # Try without path as last resort
         try:
-            self.engine = Stockfish()
+            self.engine = Stockfish(path=path)
             self.engine.set_depth(10)
-            print("Stockfish initialized without explicit path")
+            self._has_wdl = self._probe_wdl()
+            self._version = self._read_version()
+            print(f"Stockfish initialized with path: {path}")
         except Exception as e:
             print(f"Failed to initialize Stockfish: {e}")
             self.engine = None
     
+    def _probe_wdl(self) -> bool:
+        """Whether the running Stockfish can report WDL stats, asked once at startup"""
+        probe = getattr(self.engine, 'does_current_engine_version_have_wdl_option', None)
+        if probe is None:
+            return True  # Older wrapper without the check; the first failed call disables WDL
+        try:
+            return bool(probe())
+        except Exception:
+            return False
+    
+    def _read_version(self) -> str:
+        """Stockfish major version, asked once at startup"""
+        try:
+            return str(self.engine.get_stockfish_major_version())
+        except Exception:
+            return "Unknown"
+    
     def is_available(self) -> bool:
         """Check if Stockfish is available"""
         return self.engine is not None
@@ -101,105 +193,100 @@ class StockfishAdapter(ChessEngineInterface):
         if not self.engine:
             return None
         
-        try:
-            # Convert board to FEN
-            fen = self._board_to_fen(board_state)
-            
-            # Validate FEN
-            if not self.engine.is_fen_valid(fen):
-                print(f"Invalid FEN: {fen}")
-                return None
-            
-            # Set position and get move
-            self.engine.set_fen_position(fen)
-            uci_move = self.engine.get_best_move()
-            
-            if uci_move:
-                return self._uci_to_coordinates(uci_move)
-            
-        except Exception as e:
-            print(f"Error getting Stockfish move: {e}")
+        with self._lock:
+            try:
+                # Convert board to FEN and load it unless it is already set
+                fen = self._get_fen(board_state)
+                if not self._load_fen(fen):
+                    print(f"Invalid FEN: {fen}")
+                    return None
+                
+                uci_move = self.engine.get_best_move()
+                
+                if uci_move:
+                    return self._uci_to_coordinates(uci_move)
+                
+            except Exception as e:
+                print(f"Error getting Stockfish move: {e}")
         
         return None
     
-    def get_top_moves(self, board_state, count: int = 3) -> List[Dict[str, Any]]:
+    def get_top_moves(self, board_state, count: int = 3) -> List[MoveInfo]:
         """Get the top N moves with their evaluations"""
         if not self.engine:
             return []
         
-        try:
-            fen = self._board_to_fen(board_state)
-            if not self.engine.is_fen_valid(fen):
+        with self._lock:
+            try:
+                if not self._load_fen(self._get_fen(board_state)):
+                    return []
+                
+                top_moves = self.engine.get_top_moves(count)
+                
+                # Convert to our format
+                result = []
+                for move_data in top_moves:
+                    move_coords = self._uci_to_coordinates(move_data['Move'])
+                    if move_coords:
+                        result.append(MoveInfo(move_coords, move_data['Move'],
+                                               move_data.get('Centipawn'), move_data.get('Mate')))
+                
+                return result
+            except Exception as e:
+                print(f"Error getting top moves: {e}")
                 return []
-            
-            self.engine.set_fen_position(fen)
-            top_moves = self.engine.get_top_moves(count)
-            
-            # Convert to our format
-            result = []
-            for move_data in top_moves:
-                move_coords = self._uci_to_coordinates(move_data['Move'])
-                if move_coords:
-                    result.append({
-                        'move': move_coords,
-                        'uci': move_data['Move'],
-                        'centipawn': move_data.get('Centipawn'),
-                        'mate': move_data.get('Mate')
-                    })
-            
-            return result
-        except Exception as e:
-            print(f"Error getting top moves: {e}")
-            return []
     
-    def get_evaluation(self, board_state) -> Dict[str, Any]:
+    def get_evaluation(self, board_state) -> Optional[Evaluation]:
         """Get position evaluation"""
         if not self.engine:
-            return {}
+            return None
         
-        try:
-            fen = self._board_to_fen(board_state)
-            if not self.engine.is_fen_valid(fen):
-                return {}
-            
-            self.engine.set_fen_position(fen)
-            evaluation = self.engine.get_evaluation()
-            
-            # Get WDL stats if available
+        with self._lock:
             try:
-                wdl = self.engine.get_wdl_stats()
-                evaluation['wdl'] = wdl
-            except:
-                pass
-            
-            return evaluation
-        except Exception as e:
-            print(f"Error getting evaluation: {e}")
-            return {}
+                if not self._load_fen(self._get_fen(board_state)):
+                    return None
+                
+                evaluation = self.engine.get_evaluation()
+                
+                # Get WDL stats if available
+                wdl = None
+                if self._has_wdl:
+                    try:
+                        wdl = self.engine.get_wdl_stats()
+                    except Exception:
+                        # Not supported after all; stop asking instead of failing every call
+                        self._has_wdl = False
+                
+                return Evaluation(evaluation['type'], evaluation['value'], wdl)
+            except Exception as e:
+                print(f"Error getting evaluation: {e}")
+                return None
     
     def set_difficulty(self, depth: int) -> None:
         """Set the thinking depth"""
         if self.engine:
             self.current_depth = max(1, min(depth, 20))  # Clamp between 1-20
-            self.engine.set_depth(self.current_depth)
+            with self._lock:
+                self.engine.set_depth(self.current_depth)
     
     def set_skill_level(self, skill: int) -> None:
         """Set engine skill level (0-20)"""
         if self.engine:
             self.current_skill = max(0, min(skill, 20))  # Clamp between 0-20
             # Configure Stockfish for skill level
-            if skill < 20:
-                # Lower skill settings
-                self.engine.update_engine_parameters({
-                    "Skill Level": skill,
-                    "UCI_LimitStrength": True,
-                    "UCI_Elo": 800 + (skill * 100)  # Scale from 800 to 2800 ELO
-                })
-            else:
-                # Maximum strength
-                self.engine.update_engine_parameters({
-                    "UCI_LimitStrength": False
-                })
+            with self._lock:
+                if skill < 20:
+                    # Lower skill settings
+                    self.engine.update_engine_parameters({
+                        "Skill Level": skill,
+                        "UCI_LimitStrength": True,
+                        "UCI_Elo": 800 + (skill * 100)  # Scale from 800 to 2800 ELO
+                    })
+                else:
+                    # Maximum strength
+                    self.engine.update_engine_parameters({
+                        "UCI_LimitStrength": False
+                    })
                 
     def get_engine_info(self) -> Dict[str, Any]:
         """Get engine configuration info"""
@@ -208,17 +295,30 @@ class StockfishAdapter(ChessEngineInterface):
             'depth': self.current_depth,
             'skill': self.current_skill,
             'available': self.is_available(),
-            'version': self._get_version()
+            'version': self._version
         }
     
-    def _get_version(self) -> str:
-        """Get Stockfish version"""
-        if self.engine:
-            try:
-                return str(self.engine.get_stockfish_major_version())
-            except:
-                return "Unknown"
-        return "Not available"
+    def _load_fen(self, fen: str) -> bool:
+        """Validate and set the position once, so queries on the same position share it"""
+        if fen != self._loaded_fen:
+            if not is_fen_playable(fen):
+                return False
+            self.engine.set_fen_position(fen)
+            self._loaded_fen = fen
+        return True
+    
+    def _get_fen(self, board_state) -> str:
+        """FEN of the position, served from an LRU cache keyed by position key and move number"""
+        key = (board_state.position_key(), len(board_state.move_history) // 2)
+        fen = self._fen_cache.get(key)
+        if fen is not None:
+            self._fen_cache.move_to_end(key)
+            return fen
+        
+        fen = self._fen_cache[key] = self._board_to_fen(board_state)
+        if len(self._fen_cache) > FEN_CACHE_SIZE:
+            self._fen_cache.popitem(last=False)
+        return fen
     
     def _board_to_fen(self, board_state) -> str:
         """Convert internal board representation to FEN notation"""
@@ -226,39 +326,23 @@ class StockfishAdapter(ChessEngineInterface):
         current_player = board_state.current_player
         move_history = board_state.move_history
         
-        # Convert board to FEN
+        # Convert board to FEN, one rank of the flat 64-square board at a time
         fen_rows = []
-        for row in board:
-            fen_row = ""
+        for rank_start in range(0, 64, 8):
+            row_chars = []
             empty_count = 0
-            for piece in row:
+            for piece in board[rank_start:rank_start + 8]:
                 if piece is None:
                     empty_count += 1
                 else:
                     if empty_count > 0:
-                        fen_row += str(empty_count)
+                        row_chars.append(EMPTY_RUNS[empty_count])
                         empty_count = 0
-                    
-                    # Map piece types to FEN notation
-                    piece_map = {
-                        'king': 'K',
-                        'queen': 'Q', 
-                        'rook': 'R',
-                        'bishop': 'B',
-                        'knight': 'N',
-                        'pawn': 'P'
-                    }
-                    
-                    piece_char = piece_map.get(piece.piece_type, 'P')
-                    
-                    if piece.color == 'black':
-                        piece_char = piece_char.lower()
-                    
-                    fen_row += piece_char
+                    row_chars.append(FEN_PIECE_CHARS[piece.index])
             
             if empty_count > 0:
-                fen_row += str(empty_count)
-            fen_rows.append(fen_row)
+                row_chars.append(EMPTY_RUNS[empty_count])
+            fen_rows.append(''.join(row_chars))
         
         board_fen = '/'.join(fen_rows)
         
@@ -276,17 +360,13 @@ class StockfishAdapter(ChessEngineInterface):
         if not uci_move or len(uci_move) != 4:
             return None
         
-        from_col = ord(uci_move[0]) - ord('a')
-        from_row = 8 - int(uci_move[1])
-        to_col = ord(uci_move[2]) - ord('a')
-        to_row = 8 - int(uci_move[3])
-        
-        # Validate coordinates
-        if not (0 <= from_row < 8 and 0 <= from_col < 8 and 
-                0 <= to_row < 8 and 0 <= to_col < 8):
+        # Unknown square names (off-board files or ranks) fail the lookup
+        from_coords = SQUARE_COORDINATES.get(uci_move[:2])
+        to_coords = SQUARE_COORDINATES.get(uci_move[2:])
+        if from_coords is None or to_coords is None:
             return None
         
-        return ((from_row, from_col), (to_row, to_col))
+        return (from_coords, to_coords)
 
 
 class MockEngineAdapter(ChessEngineInterface):
@@ -294,6 +374,7 @@ class MockEngineAdapter(ChessEngineInterface):
     
     def __init__(self):
         self.depth = 5
+        self._moves_cache = (None, None)  # (position key, packed legal moves)
     
     def is_available(self) -> bool:
         return True
@@ -302,42 +383,30 @@ class MockEngineAdapter(ChessEngineInterface):
         """Return a random valid move (mock implementation)"""
         import random
         
-        # Get all valid moves for current player
-        valid_moves = []
-        for row in range(8):
-            for col in range(8):
-                piece = board_state.board[row][col]
-                if piece and piece.color == board_state.current_player:
-                    piece_moves = piece.get_valid_moves(board_state.board)
-                    for move_row, move_col in piece_moves:
-                        valid_moves.append(((row, col), (move_row, move_col)))
+        # Get all valid moves for current player, packed as from_sq << 6 | to_sq
+        valid_moves = self._legal_moves(board_state)
         
         if valid_moves:
-            return random.choice(valid_moves)
+            return self._unpack_move(random.choice(valid_moves))
         
         return None
     
-    def get_top_moves(self, board_state, count: int = 3) -> List[Dict[str, Any]]:
+    def get_top_moves(self, board_state, count: int = 3) -> List[MoveInfo]:
         """Return top N random moves (mock implementation)"""
         import random
         
-        valid_moves = []
-        for row in range(8):
-            for col in range(8):
-                piece = board_state.board[row][col]
-                if piece and piece.color == board_state.current_player:
-                    piece_moves = piece.get_valid_moves(board_state.board)
-                    for move_row, move_col in piece_moves:
-                        valid_moves.append({
-                            'move': ((row, col), (move_row, move_col)),
-                            'uci': f"{chr(ord('a') + col)}{8 - row}{chr(ord('a') + move_col)}{8 - move_row}",
-                            'centipawn': random.randint(-100, 100),
-                            'mate': None
-                        })
+        valid_moves = self._legal_moves(board_state)
+        
+        # Only the sampled moves are unpacked into coordinates
+        result = []
+        for move in random.sample(valid_moves, min(count, len(valid_moves))):
+            result.append(MoveInfo(self._unpack_move(move),
+                                   SQUARE_NAMES[(move >> 6) & 63] + SQUARE_NAMES[move & 63],
+                                   random.randint(-100, 100), None))
         
-        return random.sample(valid_moves, min(count, len(valid_moves)))
+        return result
     
-    def get_evaluation(self, board_state) -> Dict[str, Any]:
+    def get_evaluation(self, board_state) -> Evaluation:
         """Return mock evaluation"""
         import random
         
@@ -346,17 +415,28 @@ class MockEngineAdapter(ChessEngineInterface):
         draws = random.randint(100, 400) 
         losses = random.randint(200, 800)
         
-        return {
-            'type': 'cp',
-            'value': random.randint(-200, 200),
-            'wdl': [wins, draws, losses]
-        }
+        return Evaluation('cp', random.randint(-200, 200), [wins, draws, losses])
     
     def set_difficulty(self, depth: int) -> None:
         self.depth = depth
     
     def set_skill_level(self, skill: int) -> None:
         self.skill = skill
+    
+    def _legal_moves(self, board_state):
+        """Packed legal moves, generated once per position and shared by the move and top-moves queries"""
+        key = board_state.position_key()
+        cached_key, moves = self._moves_cache
+        if key != cached_key:
+            moves = board_state.legal_moves()
+            self._moves_cache = (key, moves)
+        return moves
+    
+    def _unpack_move(self, move: int) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+        """Convert a packed move into board coordinates"""
+        from_sq = (move >> 6) & 63
+        to_sq = move & 63
+        return ((from_sq >> 3, from_sq & 7), (to_sq >> 3, to_sq & 7))
 
 
 class ChessEngineManager:
@@ -364,42 +444,54 @@ class ChessEngineManager:
     
     def __init__(self):
         self.engines = {}
-        self.active_engine = None
+        self.active_engine = None  # Chosen on first use, so Stockfish is not started at import
+        self._engine_factories = {}  # Engines found but not started yet, by name
         self._initialize_engines()
     
     def _initialize_engines(self):
-        """Initialize available engines"""
-        # Try to initialize Stockfish
-        stockfish = StockfishAdapter()
-        if stockfish.is_available():
-            self.engines['stockfish'] = stockfish
-            self.active_engine = stockfish
-            print("Stockfish engine available")
+        """Register available engines without starting them"""
+        # Stockfish is only started when an engine is first needed
+        if STOCKFISH_AVAILABLE and find_stockfish():
+            self._engine_factories['stockfish'] = StockfishAdapter
         else:
             print("Stockfish not available, using mock engine")
         
         # Always have mock engine as fallback
         self.engines['mock'] = MockEngineAdapter()
-        
-        # If no other engine is available, use mock
-        if not self.active_engine:
-            self.active_engine = self.engines['mock']
+    
+    def _get_engine(self, engine_name: str) -> Optional[ChessEngineInterface]:
+        """Engine by name, started on first request; None if it is unknown or failed to start"""
+        factory = self._engine_factories.pop(engine_name, None)
+        if factory is not None:
+            engine = factory()
+            if engine.is_available():
+                self.engines[engine_name] = engine
+                print(f"{engine_name.capitalize()} engine available")
+            else:
+                print(f"{engine_name.capitalize()} failed to start, using mock engine")
+        return self.engines.get(engine_name)
     
     def get_active_engine(self) -> ChessEngineInterface:
         """Get the currently active engine"""
+        if self.active_engine is None:
+            # Prefer Stockfish; if no other engine is available, use mock
+            self.active_engine = self._get_engine('stockfish') or self.engines['mock']
         return self.active_engine
     
     def set_active_engine(self, engine_name: str) -> bool:
         """Set the active engine by name"""
-        if engine_name in self.engines:
-            self.active_engine = self.engines[engine_name]
+        engine = self._get_engine(engine_name)
+        if engine is not None:
+            self.active_engine = engine
             return True
         return False
     
     def get_available_engines(self) -> List[str]:
         """Get list of available engine names"""
-        return list(self.engines.keys())
+        return list(self._engine_factories) + list(self.engines.keys())
     
     def is_engine_available(self, engine_name: str) -> bool:
         """Check if a specific engine is available"""
-        return engine_name in self.engines and self.engines[engine_name].is_available()
\ No newline at end of file
+        if engine_name in self._engine_factories:
+            return True  # Binary found; it is started on first use
+        return engine_name in self.engines and self.engines[engine_name].is_available()
@@ -0,0 +1,184 @@
+"""
+Move Generation
+Legal move generation on plain bitboards, independent of the UI objects
+"""
+
+from array import array
+from typing import Sequence
+
+from bitboard import (
+    FULL, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, BETWEEN,
+    KNIGHT_ATTACKS, KING_ATTACKS, PAWN_ATTACKS, PAWN_PUSHES, PAWN_DOUBLE_PUSHES,
+    rook_attacks, bishop_attacks, queen_attacks, square_attacked_by, attackers_to, iter_bits
+)
+
+
+# A move is packed into 16 bits: from square in bits 6-11, to square in bits 0-5.
+# Bits 12-15 are left free for flags such as promotions.
+def encode_move(from_sq: int, to_sq: int) -> int:
+    """Pack a move into a single int"""
+    return (from_sq << 6) | to_sq
+
+
+def move_from(move: int) -> int:
+    """Origin square of a packed move"""
+    return (move >> 6) & 63
+
+
+def move_to(move: int) -> int:
+    """Destination square of a packed move"""
+    return move & 63
+
+
+def occupancy(bb: Sequence[int], color: int) -> int:
+    """Bitboard of all squares occupied by one color"""
+    base = color * 6
+    return bb[base] | bb[base + 1] | bb[base + 2] | bb[base + 3] | bb[base + 4] | bb[base + 5]
+
+
+def _pawn_targets(color: int, sq: int, own: int, enemy: int) -> int:
+    empty = ~(own | enemy) & FULL
+    targets = PAWN_PUSHES[color][sq] & empty
+    if targets:
+        targets |= PAWN_DOUBLE_PUSHES[color][sq] & empty
+    return targets | (PAWN_ATTACKS[color][sq] & enemy)
+
+
+def _knight_targets(color: int, sq: int, own: int, enemy: int) -> int:
+    return KNIGHT_ATTACKS[sq] & ~own
+
+
+def _bishop_targets(color: int, sq: int, own: int, enemy: int) -> int:
+    return bishop_attacks(sq, own | enemy) & ~own
+
+
+def _rook_targets(color: int, sq: int, own: int, enemy: int) -> int:
+    return rook_attacks(sq, own | enemy) & ~own
+
+
+def _queen_targets(color: int, sq: int, own: int, enemy: int) -> int:
+    return queen_attacks(sq, own | enemy) & ~own
+
+
+def _king_targets(color: int, sq: int, own: int, enemy: int) -> int:
+    return KING_ATTACKS[sq] & ~own
+
+
+# Indexed by piece type id (PAWN..KING)
+_TARGET_GENERATORS = (
+    _pawn_targets, _knight_targets, _bishop_targets, _rook_targets, _queen_targets, _king_targets
+)
+
+# Non-king pieces from most to least mobile, so a legal move turns up early
+_MOBILITY_ORDER = (QUEEN, ROOK, KNIGHT, BISHOP, PAWN)
+
+
+def pseudo_legal_targets(bb: Sequence[int], color: int, piece_type: int, sq: int) -> int:
+    """Destination squares for a piece, ignoring whether the own king is left in check"""
+    return _TARGET_GENERATORS[piece_type](color, sq, occupancy(bb, color), occupancy(bb, 1 - color))
+
+
+def is_legal_move(bb: Sequence[int], color: int, piece_type: int,
+                  from_sq: int, to_sq: int, king_sq: int) -> bool:
+    """Check that a move does not leave the mover's king attacked"""
+    # Make the move on a copy so the caller's bitboards are never touched
+    board = list(bb)
+    to_bit = 1 << to_sq
+    board[color * 6 + piece_type] ^= (1 << from_sq) | to_bit
+    enemy_base = (1 - color) * 6
+    for index in range(enemy_base, enemy_base + 6):
+        if board[index] & to_bit:
+            board[index] ^= to_bit
+            break
+
+    if piece_type == KING:
+        king_sq = to_sq
+    return not square_attacked_by(board, king_sq, 1 - color, occupancy(board, 0) | occupancy(board, 1))
+
+
+def pinned_pieces(bb: Sequence[int], color: int, king_sq: int) -> int:
+    """Own pieces that are the only blocker between their king and an enemy slider"""
+    own = occupancy(bb, color)
+    enemy = occupancy(bb, 1 - color)
+    enemy_base = (1 - color) * 6
+    queens = bb[enemy_base + QUEEN]
+    # Looking through own pieces, find the sliders lined up on the king
+    snipers = ((rook_attacks(king_sq, enemy) & (bb[enemy_base + ROOK] | queens))
+               | (bishop_attacks(king_sq, enemy) & (bb[enemy_base + BISHOP] | queens)))
+    pinned = 0
+    for sniper_sq in iter_bits(snipers):
+        blockers = BETWEEN[king_sq][sniper_sq] & (own | enemy)
+        if blockers & own and not blockers & (blockers - 1):
+            pinned |= blockers
+    return pinned
+
+
+def legal_targets(bb: Sequence[int], color: int, piece_type: int, sq: int, king_sq: int) -> int:
+    """Destination squares for a piece that keep the own king safe
+
+    A piece other than the king that is not pinned only has to answer a
+    check, if there is one, so its moves are filtered with bitboard masks.
+    King moves and pinned pieces are tested by making each move.
+    """
+    own = occupancy(bb, color)
+    enemy = occupancy(bb, 1 - color)
+    targets = _TARGET_GENERATORS[piece_type](color, sq, own, enemy)
+    if piece_type != KING:
+        checkers = attackers_to(bb, king_sq, 1 - color, own | enemy)
+        if checkers:
+            if checkers & (checkers - 1):
+                # Double check: only the king can move
+                return 0
+            targets &= checkers | BETWEEN[king_sq][checkers.bit_length() - 1]
+        if not (pinned_pieces(bb, color, king_sq) >> sq) & 1:
+            return targets
+
+    for to_sq in iter_bits(targets):
+        if not is_legal_move(bb, color, piece_type, sq, to_sq, king_sq):
+            targets ^= 1 << to_sq
+    return targets
+
+
+def has_legal_move(bb: Sequence[int], color: int, king_sq: int) -> bool:
+    """Check if a side has at least one legal move, stopping at the first
+
+    King moves are tried first, then the other pieces from most to least
+    mobile. While in check they only try squares that capture the checker
+    or block its line, captures first.
+    """
+    own = occupancy(bb, color)
+    enemy = occupancy(bb, 1 - color)
+    for to_sq in iter_bits(KING_ATTACKS[king_sq] & ~own):
+        if is_legal_move(bb, color, KING, king_sq, to_sq, king_sq):
+            return True
+
+    evasions = FULL
+    checkers = attackers_to(bb, king_sq, 1 - color, own | enemy)
+    if checkers:
+        if checkers & (checkers - 1):
+            # Double check: only a king move can help
+            return False
+        evasions = checkers | BETWEEN[king_sq][checkers.bit_length() - 1]
+
+    for piece_type in _MOBILITY_ORDER:
+        generate = _TARGET_GENERATORS[piece_type]
+        for sq in iter_bits(bb[color * 6 + piece_type]):
+            targets = generate(color, sq, own, enemy) & evasions
+            for to_sq in iter_bits(targets & enemy):
+                if is_legal_move(bb, color, piece_type, sq, to_sq, king_sq):
+                    return True
+            for to_sq in iter_bits(targets & ~enemy):
+                if is_legal_move(bb, color, piece_type, sq, to_sq, king_sq):
+                    return True
+    return False
+
+
+def legal_moves(bb: Sequence[int], color: int, king_sq: int) -> array:
+    """All legal moves for a side as packed 16-bit moves"""
+    moves = array('H')
+    for piece_type in range(6):
+        for sq in iter_bits(bb[color * 6 + piece_type]):
+            origin = sq << 6
+            for to_sq in iter_bits(legal_targets(bb, color, piece_type, sq, king_sq)):
+                moves.append(origin | to_sq)
+    return moves
@@ -0,0 +1,36 @@
+"""
+Text Cache
+Shared fonts and rendered text surfaces, so unchanged labels are rasterized once
+"""
+
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+import pygame
+
+TEXT_CACHE_SIZE = 256  # Rendered surfaces kept before the least recently used is dropped
+
+_fonts: Dict[int, pygame.font.Font] = {}
+_surfaces: 'OrderedDict[Tuple[pygame.font.Font, str, Tuple[int, ...]], pygame.Surface]' = OrderedDict()
+
+
+def get_font(size: int) -> pygame.font.Font:
+    """Default-face font of the given size, created on first use and then reused"""
+    font = _fonts.get(size)
+    if font is None:
+        font = _fonts[size] = pygame.font.Font(None, size)
+    return font
+
+
+def render_text(font: pygame.font.Font, text: str, color: Tuple[int, ...]) -> pygame.Surface:
+    """Antialiased text surface, served from an LRU cache keyed by font, text and color"""
+    key = (font, text, color)
+    surface = _surfaces.get(key)
+    if surface is not None:
+        _surfaces.move_to_end(key)
+        return surface
+
+    surface = _surfaces[key] = font.render(text, True, color)
+    if len(_surfaces) > TEXT_CACHE_SIZE:
+        _surfaces.popitem(last=False)
+    return surface
@@ -6,16 +6,43 @@ Visual representation of win probabilities with animated bars and colors
 import pygame
 import math
 from typing import List, Tuple
+from text_cache import get_font, render_text
+
+# Unit circle sampled at whole degrees, so pie segments need no trig per frame
+UNIT_COS = tuple(math.cos(math.radians(degree)) for degree in range(360))
+UNIT_SIN = tuple(math.sin(math.radians(degree)) for degree in range(360))
+
+OUTCOME_COLORS = ((220, 220, 220), (200, 200, 0), (80, 80, 80))  # White win, draw (yellow), black win
+OUTCOME_LABELS = ("Blancas", "Empate", "Negras")
+PIE_MARGIN = 2  # Room around the cached pie surface for the segment outlines
+
+
+def lighten_color(color: Tuple[int, int, int], factor: float) -> Tuple[int, int, int]:
+    """Lighten a color by a factor"""
+    return tuple(min(255, int(c + (255 - c) * factor)) for c in color)
+
+
+# Segment outlines (0.2) and bar glows (0.3) of the outcome colors, computed once
+LIGHTENED_COLORS = {(color, factor): lighten_color(color, factor)
+                    for color in OUTCOME_COLORS for factor in (0.2, 0.3)}
 
 
 class WinProbabilityWidget:
     """Animated widget showing win probabilities"""
     
     def __init__(self):
-        self.current_probs = [33.3, 33.3, 33.3]  # [white_win, draw, black_win]
-        self.target_probs = [33.3, 33.3, 33.3]
+        # Tenths of a percent, the precision they are shown with, so comparisons are exact
+        self.current_probs = [333, 333, 333]  # [white_win, draw, black_win]
+        self.target_probs = [333, 333, 333]
         self.animation_speed = 0.1
         self.last_update_time = 0
+        self._animating = False  # current_probs still moving towards target_probs
+        self._pie_key = None  # (radius, segment angles) that _pie_surf was drawn for
+        self._pie_surf = None  # Pie chart segments, redrawn only when the key changes
+        self._bars_key = None  # (width, bar height, probabilities) that _bars_surf was drawn for
+        self._bars_surf = None  # Horizontal probability bars without their labels
+        self._eval_bar_key = None  # (width, height, clamped evaluation) that _eval_bar_surf was drawn for
+        self._eval_bar_surf = None  # Evaluation bar without its text
         
     def update_probabilities(self, wdl_stats: List[int]):
         """Update target probabilities from WDL stats"""
@@ -28,135 +55,161 @@ class WinProbabilityWidget:
         if total == 0:
             return
         
-        # Calculate percentages
+        # Calculate percentages, in tenths
         self.target_probs = [
-            (wins / total) * 100,
-            (draws / total) * 100,
-            (losses / total) * 100
+            round((wins / total) * 1000),
+            round((draws / total) * 1000),
+            round((losses / total) * 1000)
         ]
+        self._animating = self.target_probs != self.current_probs
     
     def update_animation(self):
         """Update animation towards target probabilities"""
+        if not self._animating:
+            return
+        
         for i in range(3):
             diff = self.target_probs[i] - self.current_probs[i]
-            if abs(diff) > 0.1:
-                self.current_probs[i] += diff * self.animation_speed
+            if abs(diff) > 1:
+                # Always move at least one tenth, so small gaps still close
+                step = int(diff * self.animation_speed)
+                self.current_probs[i] += step or (1 if diff > 0 else -1)
             else:
                 self.current_probs[i] = self.target_probs[i]
+        
+        # Every value snaps to its target once close enough, so this ends the animation
+        self._animating = self.current_probs != self.target_probs
     
     def draw_circular_probability(self, screen, center_x: int, center_y: int, radius: int):
         """Draw circular probability chart"""
         # Background circle
         pygame.draw.circle(screen, (40, 40, 40), (center_x, center_y), radius, 2)
         
-        # Calculate angles for each segment
-        white_angle = (self.current_probs[0] / 100) * 360
-        draw_angle = (self.current_probs[1] / 100) * 360
-        black_angle = (self.current_probs[2] / 100) * 360
-        
-        # Draw segments
-        start_angle = -90  # Start from top
-        
-        # White segment
-        if white_angle > 0:
-            self._draw_arc_segment(screen, center_x, center_y, radius - 5, 
-                                 start_angle, white_angle, (220, 220, 220))
-            start_angle += white_angle
-        
-        # Draw segment  
-        if draw_angle > 0:
-            self._draw_arc_segment(screen, center_x, center_y, radius - 5,
-                                 start_angle, draw_angle, (200, 200, 0))
-            start_angle += draw_angle
+        # Segment angles in whole degrees, the resolution of the arc lookup tables
+        angles = tuple(round(prob * 0.36) for prob in self.current_probs)
         
-        # Black segment
-        if black_angle > 0:
-            self._draw_arc_segment(screen, center_x, center_y, radius - 5,
-                                 start_angle, black_angle, (80, 80, 80))
+        # The segments are rasterized only when an angle or the size changes
+        key = (radius, angles)
+        if key != self._pie_key:
+            self._pie_key = key
+            self._pie_surf = self._render_pie(radius - 5, angles)
+        offset = radius - 5 + PIE_MARGIN
+        screen.blit(self._pie_surf, (center_x - offset, center_y - offset))
         
         # Center text
-        font = pygame.font.Font(None, 24)
-        prob_text = f"{self.current_probs[0]:.1f}%"
-        text_surface = font.render(prob_text, True, (255, 255, 255))
+        font = get_font(24)
+        prob_text = f"{self.current_probs[0] / 10:.1f}%"
+        text_surface = render_text(font, prob_text, (255, 255, 255))
         text_rect = text_surface.get_rect(center=(center_x, center_y - 10))
         screen.blit(text_surface, text_rect)
         
-        white_text = font.render("Blancas", True, (200, 200, 200))
+        white_text = render_text(font, "Blancas", (200, 200, 200))
         white_rect = white_text.get_rect(center=(center_x, center_y + 10))
         screen.blit(white_text, white_rect)
     
     def draw_horizontal_bars(self, screen, x: int, y: int, width: int, height: int):
         """Draw horizontal probability bars"""
-        font = pygame.font.Font(None, 20)
-        
-        # Colors for each outcome
-        colors = [
-            (220, 220, 220),  # White
-            (200, 200, 0),    # Draw (yellow)
-            (80, 80, 80)      # Black
-        ]
-        
-        labels = ["Blancas", "Empate", "Negras"]
+        font = get_font(20)
         
         bar_height = height // 4
         spacing = 5
         
-        for i, (prob, color, label) in enumerate(zip(self.current_probs, colors, labels)):
-            bar_y = y + i * (bar_height + spacing)
-            
-            # Label
-            label_surface = font.render(f"{label}: {prob:.1f}%", True, (220, 220, 220))
-            screen.blit(label_surface, (x, bar_y))
+        # The bars are redrawn only while the probabilities animate or the size changes
+        key = (width, bar_height, tuple(self.current_probs))
+        if key != self._bars_key:
+            self._bars_key = key
+            self._bars_surf = self._render_bars(width, bar_height, spacing)
+        screen.blit(self._bars_surf, (x, y + 20))
+        
+        # Labels
+        label_blits = []
+        for i, (prob, label) in enumerate(zip(self.current_probs, OUTCOME_LABELS)):
+            label_surface = render_text(font, f"{label}: {prob / 10:.1f}%", (220, 220, 220))
+            label_blits.append((label_surface, (x, y + i * (bar_height + spacing))))
+        screen.blits(label_blits, doreturn=False)
+    
+    def draw_evaluation_bar(self, screen, x: int, y: int, width: int, height: int, 
+                          evaluation: float):
+        """Draw evaluation bar (-10 to +10 scale)"""
+        font = get_font(20)
+        
+        # Clamp evaluation to reasonable range
+        eval_clamped = max(-10, min(10, evaluation))
+        
+        # The bar is redrawn only when the evaluation or the size changes
+        key = (width, height, eval_clamped)
+        if key != self._eval_bar_key:
+            self._eval_bar_key = key
+            self._eval_bar_surf = self._render_evaluation_bar(width, height, eval_clamped)
+        screen.blit(self._eval_bar_surf, (x, y))
+        
+        # Evaluation text
+        eval_text = f"Eval: {evaluation:+.2f}"
+        text_surface = render_text(font, eval_text, (220, 220, 220))
+        screen.blit(text_surface, (x, y + height + 5))
+    
+    def _render_bars(self, width: int, bar_height: int, spacing: int) -> pygame.Surface:
+        """Transparent surface with the three probability bars, leaving gaps for their labels"""
+        surface = pygame.Surface((width, 3 * bar_height + 2 * spacing), pygame.SRCALPHA)
+        
+        for i, (prob, color) in enumerate(zip(self.current_probs, OUTCOME_COLORS)):
+            bar_y = i * (bar_height + spacing)
             
             # Bar background
-            bar_rect = pygame.Rect(x, bar_y + 20, width, bar_height)
-            pygame.draw.rect(screen, (40, 40, 40), bar_rect)
-            pygame.draw.rect(screen, (100, 100, 100), bar_rect, 1)
+            bar_rect = pygame.Rect(0, bar_y, width, bar_height)
+            pygame.draw.rect(surface, (40, 40, 40), bar_rect)
+            pygame.draw.rect(surface, (100, 100, 100), bar_rect, 1)
             
             # Filled bar
-            fill_width = int((prob / 100) * width)
+            fill_width = prob * width // 1000
             if fill_width > 0:
-                fill_rect = pygame.Rect(x, bar_y + 20, fill_width, bar_height)
-                pygame.draw.rect(screen, color, fill_rect)
+                fill_rect = pygame.Rect(0, bar_y, fill_width, bar_height)
+                pygame.draw.rect(surface, color, fill_rect)
                 
                 # Add glow effect
-                glow_rect = pygame.Rect(x, bar_y + 20, fill_width, bar_height)
-                pygame.draw.rect(screen, self._lighten_color(color, 0.3), glow_rect, 2)
+                pygame.draw.rect(surface, self._lighten_color(color, 0.3), fill_rect, 2)
+        return surface
     
-    def draw_evaluation_bar(self, screen, x: int, y: int, width: int, height: int, 
-                          evaluation: float):
-        """Draw evaluation bar (-10 to +10 scale)"""
-        font = pygame.font.Font(None, 20)
-        
-        # Clamp evaluation to reasonable range
-        eval_clamped = max(-10, min(10, evaluation))
+    def _render_evaluation_bar(self, width: int, height: int, eval_clamped: float) -> pygame.Surface:
+        """Evaluation bar background, center line and advantage fill"""
+        # One row taller than the bar, for the end of the center line
+        surface = pygame.Surface((width, height + 1), pygame.SRCALPHA)
         
         # Background
-        bg_rect = pygame.Rect(x, y, width, height)
-        pygame.draw.rect(screen, (40, 40, 40), bg_rect)
-        pygame.draw.rect(screen, (100, 100, 100), bg_rect, 1)
+        bg_rect = pygame.Rect(0, 0, width, height)
+        pygame.draw.rect(surface, (40, 40, 40), bg_rect)
+        pygame.draw.rect(surface, (100, 100, 100), bg_rect, 1)
         
         # Center line
-        center_x = x + width // 2
-        pygame.draw.line(screen, (100, 100, 100), 
-                        (center_x, y), (center_x, y + height), 1)
-        
-        # Evaluation bar
-        if eval_clamped > 0:
-            # White advantage
-            bar_width = int((eval_clamped / 10) * (width // 2))
-            bar_rect = pygame.Rect(center_x, y + 2, bar_width, height - 4)
-            pygame.draw.rect(screen, (220, 220, 220), bar_rect)
-        elif eval_clamped < 0:
-            # Black advantage  
-            bar_width = int((abs(eval_clamped) / 10) * (width // 2))
-            bar_rect = pygame.Rect(center_x - bar_width, y + 2, bar_width, height - 4)
-            pygame.draw.rect(screen, (80, 80, 80), bar_rect)
+        center_x = width // 2
+        pygame.draw.line(surface, (100, 100, 100), 
+                        (center_x, 0), (center_x, height), 1)
+        
+        # Evaluation bar, skipped when it would round to nothing
+        bar_width = int((abs(eval_clamped) / 10) * (width // 2))
+        if bar_width > 0:
+            if eval_clamped > 0:
+                # White advantage
+                bar_rect = pygame.Rect(center_x, 2, bar_width, height - 4)
+                pygame.draw.rect(surface, (220, 220, 220), bar_rect)
+            else:
+                # Black advantage
+                bar_rect = pygame.Rect(center_x - bar_width, 2, bar_width, height - 4)
+                pygame.draw.rect(surface, (80, 80, 80), bar_rect)
+        return surface
+    
+    def _render_pie(self, radius: int, angles: Tuple[int, int, int]) -> pygame.Surface:
+        """Transparent surface with the white, draw and black segments of the pie chart"""
+        size = 2 * (radius + PIE_MARGIN) + 1
+        surface = pygame.Surface((size, size), pygame.SRCALPHA)
+        center = radius + PIE_MARGIN
         
-        # Evaluation text
-        eval_text = f"Eval: {evaluation:+.2f}"
-        text_surface = font.render(eval_text, True, (220, 220, 220))
-        screen.blit(text_surface, (x, y + height + 5))
+        start_angle = -90  # Start from top
+        for arc_angle, color in zip(angles, OUTCOME_COLORS):
+            if arc_angle > 0:
+                self._draw_arc_segment(surface, center, center, radius, start_angle, arc_angle, color)
+                start_angle += arc_angle
+        return surface
     
     def _draw_arc_segment(self, screen, center_x: int, center_y: int, radius: int,
                          start_angle: float, arc_angle: float, color: Tuple[int, int, int]):
@@ -164,19 +217,15 @@ class WinProbabilityWidget:
         if arc_angle <= 0:
             return
         
-        # Convert to radians
-        start_rad = math.radians(start_angle)
-        end_rad = math.radians(start_angle + arc_angle)
-        
         # Create points for polygon
         points = [(center_x, center_y)]
         
-        # Add arc points
+        # Add arc points, rounded to the nearest whole degree of the lookup tables
         steps = max(3, int(arc_angle / 5))  # More steps for smoother arcs
         for i in range(steps + 1):
-            angle = start_rad + (end_rad - start_rad) * (i / steps)
-            x = center_x + radius * math.cos(angle)
-            y = center_y + radius * math.sin(angle)
+            degree = round(start_angle + arc_angle * (i / steps)) % 360
+            x = center_x + radius * UNIT_COS[degree]
+            y = center_y + radius * UNIT_SIN[degree]
             points.append((x, y))
         
         # Draw filled polygon
@@ -185,5 +234,8 @@ class WinProbabilityWidget:
             pygame.draw.polygon(screen, self._lighten_color(color, 0.2), points, 2)
     
     def _lighten_color(self, color: Tuple[int, int, int], factor: float) -> Tuple[int, int, int]:
-        """Lighten a color by a factor"""
-        return tuple(min(255, int(c + (255 - c) * factor)) for c in color)
\ No newline at end of file
+        """Lighten a color by a factor, using the precomputed table for the outcome colors"""
+        lightened = LIGHTENED_COLORS.get((color, factor))
+        if lightened is None:
+            lightened = lighten_color(color, factor)
+        return lightened
\ No newline at end of file